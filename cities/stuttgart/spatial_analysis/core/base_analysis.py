@@ -8,14 +8,26 @@ their analysis for unique characteristics.
 """
 
 import logging
+import numbers
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from abc import ABC, abstractmethod
 
 logger = logging.getLogger(__name__)
 
+# Output file name (without extension) of the batched scalar results
+SCALARS_KEY = "_scalars"
+
+def _numpy_scalar(value):
+    """json fallback hook: write numpy scalars as their Python equivalents"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 class BaseCityAnalysis(ABC):
     """
     Base class for all city analysis
@@ -27,53 +39,101 @@ class BaseCityAnalysis(ABC):
     - Error handling and logging
     """
     
-    def __init__(self, city_name: str, city_config: dict):
+    # Directories already created in this process
+    _dirs_created: set = set()
+    
+    def __init__(self, city_name: str, city_config: dict, save_legacy_geojson: bool = False):
         """
         Initialize base city analysis
         
         Args:
             city_name: Name of the city (e.g., 'stuttgart', 'curitiba')
             city_config: City-specific configuration dictionary
+            save_legacy_geojson: Also write GeoDataFrame results as GeoJSON
         """
         self.city_name = city_name
         self.city_config = city_config
+        self.save_legacy_geojson = save_legacy_geojson
         self.data_loader = DataLoader(city_config)
         self.kpi_calculator = KPICalculator(city_config)
         self.visualizer = VisualizationBase(city_config)
+        self._city_data: Optional[Dict[str, Any]] = None
         
         # Setup logging for this city
         self._setup_logging()
         
-        logger.info(f"Initialized analysis for {city_name}")
+        self.logger.info(f"Initialized analysis for {city_name}")
     
     def _setup_logging(self):
-        """Setup city-specific logging"""
+        """Setup city-specific logging on a per-city child logger"""
         log_dir = Path(f"cities/{self.city_name}/spatial_analysis/logs")
-        log_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(log_dir)
+        log_path = (log_dir / f"{self.city_name}_analysis.log").resolve()
+        
+        self.logger = logging.getLogger(f"{__name__}.{self.city_name}")
+        
+        # Only one file handler per city, however many instances are created
+        if any(getattr(h, 'baseFilename', None) == str(log_path) for h in self.logger.handlers):
+            return
         
         # Configure file handler for this city
-        file_handler = logging.FileHandler(log_dir / f"{self.city_name}_analysis.log")
+        try:
+            file_handler = logging.FileHandler(log_path)
+        except FileNotFoundError:
+            self._ensure_dir(log_dir, refresh=True)
+            file_handler = logging.FileHandler(log_path)
         file_handler.setLevel(logging.INFO)
         
         # Add to logger
-        logger.addHandler(file_handler)
+        self.logger.addHandler(file_handler)
+    
+    @classmethod
+    def _ensure_dir(cls, path: Path, refresh: bool = False):
+        """
+        Create a directory once per process instead of probing it on every call
+        
+        Args:
+            path: Directory to create; memoized by its resolved path, so a
+                relative path still works after a chdir
+            refresh: Forget the memo and create it again, e.g. after a write
+                failed because the directory was removed
+        """
+        key = str(path.resolve())
+        if refresh:
+            cls._dirs_created.discard(key)
+        if key not in cls._dirs_created:
+            path.mkdir(parents=True, exist_ok=True)
+            cls._dirs_created.add(key)
     
     def load_city_data(self) -> Dict[str, Any]:
         """
         Load all city data using shared logic
         
+        The loaded layers are cached on the instance for the rest of the
+        session, so repeated calls (e.g. from run_full_analysis and again
+        inside run_city_analysis) only read from disk once. Call
+        invalidate_cache() to force a reload.
+        
         Returns:
             Dictionary containing all loaded data layers
         """
+        if self._city_data is not None:
+            return self._city_data
+        
         try:
-            logger.info(f"Loading data for {self.city_name}")
+            self.logger.info(f"Loading data for {self.city_name}")
             data = self.data_loader.load_all_layers()
-            logger.info(f"Successfully loaded {len(data)} data layers for {self.city_name}")
+            self.logger.info(f"Successfully loaded {len(data)} data layers for {self.city_name}")
+            self._city_data = data
             return data
         except Exception as e:
-            logger.error(f"Failed to load data for {self.city_name}: {e}")
+            self.logger.error(f"Failed to load data for {self.city_name}: {e}")
             raise
     
+    def invalidate_cache(self):
+        """Drop the cached city data so the next load_city_data() re-reads it"""
+        self._city_data = None
+    
     def calculate_basic_kpis(self) -> pd.DataFrame:
         """
         Calculate basic KPIs using shared logic
@@ -82,12 +142,12 @@ class BaseCityAnalysis(ABC):
             DataFrame with basic KPIs
         """
         try:
-            logger.info(f"Calculating basic KPIs for {self.city_name}")
+            self.logger.info(f"Calculating basic KPIs for {self.city_name}")
             kpis = self.kpi_calculator.calculate_basic_indicators()
-            logger.info(f"Successfully calculated {len(kpis)} basic KPIs for {self.city_name}")
+            self.logger.info(f"Successfully calculated {len(kpis)} basic KPIs for {self.city_name}")
             return kpis
         except Exception as e:
-            logger.error(f"Failed to calculate basic KPIs for {self.city_name}: {e}")
+            self.logger.error(f"Failed to calculate basic KPIs for {self.city_name}: {e}")
             raise
     
     def generate_base_maps(self) -> Dict[str, str]:
@@ -98,12 +158,12 @@ class BaseCityAnalysis(ABC):
             Dictionary mapping map names to file paths
         """
         try:
-            logger.info(f"Generating base maps for {self.city_name}")
+            self.logger.info(f"Generating base maps for {self.city_name}")
             maps = self.visualizer.create_base_maps()
-            logger.info(f"Successfully generated {len(maps)} base maps for {self.city_name}")
+            self.logger.info(f"Successfully generated {len(maps)} base maps for {self.city_name}")
             return maps
         except Exception as e:
-            logger.error(f"Failed to generate base maps for {self.city_name}: {e}")
+            self.logger.error(f"Failed to generate base maps for {self.city_name}: {e}")
             raise
     
     @abstractmethod
@@ -134,27 +194,102 @@ class BaseCityAnalysis(ABC):
             output_dir = f"cities/{self.city_name}/spatial_analysis/outputs"
         
         output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(output_path)
         
-        # Save results based on type
+        # Dispatch each result to a writer by type
+        tasks = []
         for key, value in results.items():
-            if isinstance(value, pd.DataFrame):
-                file_path = output_path / f"{key}.parquet"
-                value.to_parquet(file_path)
-                logger.info(f"Saved {key} to {file_path}")
-            elif isinstance(value, gpd.GeoDataFrame):
-                file_path = output_path / f"{key}.geojson"
-                value.to_file(file_path, driver='GeoJSON')
-                logger.info(f"Saved {key} to {file_path}")
+            # GeoDataFrame first: it is also a pd.DataFrame
+            if isinstance(value, gpd.GeoDataFrame):
+                tasks.append((key, value, self._save_geodataframe))
+            elif isinstance(value, pd.DataFrame):
+                tasks.append((key, value, self._save_dataframe))
             elif isinstance(value, dict):
-                file_path = output_path / f"{key}.json"
-                import json
-                with open(file_path, 'w') as f:
-                    json.dump(value, f, indent=2)
-                logger.info(f"Saved {key} to {file_path}")
+                tasks.append((key, value, self._save_dict))
+        
+        # Scalars (numpy ones included) are batched into one file instead of one
+        # file per key; the leading underscore keeps it apart from result files
+        scalar_results = {
+            k: v for k, v in results.items() if isinstance(v, (str, numbers.Number, np.generic))
+        }
+        if scalar_results:
+            if any(key == SCALARS_KEY for key, _, _ in tasks):
+                raise ValueError(f"Result name {SCALARS_KEY!r} is reserved for batched scalars")
+            tasks.append((SCALARS_KEY, scalar_results, self._save_dict))
+        
+        def run_task(task):
+            key, value, writer = task
+            try:
+                try:
+                    writer(output_path, key, value)
+                except OSError:
+                    # Retry only if the directory was removed after it was memoized
+                    # (pandas reports that as a plain OSError, not FileNotFoundError)
+                    if output_path.is_dir():
+                        raise
+                    self._ensure_dir(output_path, refresh=True)
+                    writer(output_path, key, value)
+            except Exception as e:
+                self.logger.error(f"Failed to save {key}: {e}")
+        
+        # Writes are I/O bound and release the GIL, so overlap them
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(8, len(tasks))) as executor:
+                list(executor.map(run_task, tasks))
         
         return str(output_path)
     
+    def _save_geodataframe(self, output_path: Path, key: str, value: gpd.GeoDataFrame):
+        """Write a GeoDataFrame as GeoParquet (and optionally legacy GeoJSON)"""
+        file_path = output_path / f"{key}.parquet"
+        try:
+            value.to_parquet(
+                file_path,
+                geometry_encoding="geoarrow",
+                compression="zstd",
+                write_covering_bbox=True
+            )
+        except ValueError:
+            # GeoArrow has no encoding for mixed geometry types or
+            # GeometryCollections; those results are stored as WKB
+            value.to_parquet(
+                file_path,
+                geometry_encoding="WKB",
+                compression="zstd",
+                write_covering_bbox=True
+            )
+        self.logger.info(f"Saved {key} to {file_path}")
+        if self.save_legacy_geojson:
+            geojson_path = output_path / f"{key}.geojson"
+            value.to_file(geojson_path, driver='GeoJSON')
+            self.logger.info(f"Saved {key} to {geojson_path}")
+    
+    def _save_dataframe(self, output_path: Path, key: str, value: pd.DataFrame):
+        """Write a DataFrame as parquet"""
+        file_path = output_path / f"{key}.parquet"
+        value.to_parquet(file_path)
+        self.logger.info(f"Saved {key} to {file_path}")
+    
+    def _save_dict(self, output_path: Path, key: str, value: dict):
+        """Write a dict as JSON"""
+        file_path = output_path / f"{key}.json"
+        self._write_json(file_path, value)
+        self.logger.info(f"Saved {key} to {file_path}")
+    
+    @staticmethod
+    def _write_json(file_path: Path, value: Any):
+        """Write a JSON document, using orjson when it is installed"""
+        try:
+            import orjson
+            file_path.write_bytes(orjson.dumps(
+                value,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ))
+        except ImportError:
+            import json
+            with open(file_path, 'w') as f:
+                json.dump(value, f, indent=2, default=_numpy_scalar)
+    
     def run_full_analysis(self) -> Dict[str, Any]:
         """
         Run the complete analysis pipeline for the city
@@ -170,7 +305,7 @@ class BaseCityAnalysis(ABC):
             Complete analysis results
         """
         try:
-            logger.info(f"Starting full analysis for {self.city_name}")
+            self.logger.info(f"Starting full analysis for {self.city_name}")
             
             # Step 1: Load city data
             city_data = self.load_city_data()
@@ -201,10 +336,10 @@ class BaseCityAnalysis(ABC):
             output_path = self.save_results(all_results)
             all_results['output_path'] = output_path
             
-            logger.info(f"Successfully completed full analysis for {self.city_name}")
+            self.logger.info(f"Successfully completed full analysis for {self.city_name}")
             return all_results
             
         except Exception as e:
-            logger.error(f"Failed to complete analysis for {self.city_name}: {e}")
+            self.logger.error(f"Failed to complete analysis for {self.city_name}: {e}")
             raise
 
@@ -5,7 +5,7 @@ Convert existing stuttgart_kpis.csv to normalized GeoParquet format
 
 import pandas as pd
 import geopandas as gpd
-from shapely import wkt
+import shapely
 from pathlib import Path
 
 def convert_csv_to_normalized_parquet():
@@ -24,9 +24,9 @@ def convert_csv_to_normalized_parquet():
         df = pd.read_csv(csv_file)
         print(f"  ✅ Loaded CSV: {len(df)} districts")
         
-        # Convert WKT geometry to shapely objects
+        # Convert WKT geometry to shapely objects (one vectorized call)
         print("🔺 Converting geometry...")
-        df['geometry'] = df['geometry'].apply(wkt.loads)
+        df['geometry'] = shapely.from_wkt(df['geometry'].to_numpy())
         
         # Check the actual bounds of the data to determine the correct CRS
         print("🔺 Detecting CRS from data bounds...")
@@ -20,7 +20,7 @@ import numpy as np
 import contextily as ctx
 import warnings
 import pandas as pd
-from shapely import wkb
+import shapely
 from shapely.geometry import Point, Polygon
 import h3
 
@@ -209,7 +209,7 @@ def load_data_for_generation():
                 df = pd.read_parquet(p)
                 if "geometry" in df.columns:
                     try:
-                        df['geometry'] = df['geometry'].apply(lambda x: wkb.loads(x) if x else None)
+                        df['geometry'] = shapely.from_wkb(df['geometry'].to_numpy())
                         return gpd.GeoDataFrame(df, geometry='geometry', crs=4326)
                     except Exception as wkb_error:
                         print(f"  ⚠️ WKB conversion failed for {p.name}: {wkb_error}")
@@ -143,16 +143,18 @@ def _read_gdf(path: Path):
         return None
     try:
         if path.suffix.lower() in {".geojson", ".json", ".gpkg"}:
-            return gpd.read_file(path)
+            return gpd.read_file(path, engine="pyogrio", use_arrow=True)
         elif path.suffix.lower() == ".parquet":
-            df = pd.read_parquet(path)
-            if "geometry" in df.columns:
-                if df['geometry'].dtype == 'object' and isinstance(df['geometry'].iloc[0], bytes):
-                    from shapely import wkb
-                    df['geometry'] = df['geometry'].apply(lambda x: wkb.loads(x) if x is not None else None)
+            try:
+                # GeoParquet: geometry is decoded natively from the geo metadata
+                return gpd.read_parquet(path)
+            except ValueError:
+                # Plain parquet without geo metadata; geometry (if any) is a WKB column
+                df = pd.read_parquet(path)
+                if "geometry" not in df.columns:
+                    return df
+                df['geometry'] = gpd.GeoSeries.from_wkb(df['geometry'], crs=4326)
                 return gpd.GeoDataFrame(df, geometry="geometry", crs=4326)
-            else:
-                return df
         else:
             return pd.read_parquet(path)
     except Exception as e:
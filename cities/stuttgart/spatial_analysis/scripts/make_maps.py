@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 from pathlib import Path
-import warnings, math
+import warnings, math, hashlib, inspect
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
@@ -18,7 +19,7 @@ from pathlib import Path
 style_helpers_path = Path(__file__).parent.parent / "style_helpers"
 sys.path.append(str(style_helpers_path))
 from style_helpers import apply_style, palette
-from h3_utils import hex_polygon
+from h3_utils import hex_polygons
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -56,45 +57,65 @@ OUTPUT_BASE, RUN_NUMBER = get_next_output_dir()
 OUT_DIR = OUTPUT_BASE / "maps"; OUT_DIR.mkdir(parents=True, exist_ok=True)
 KEPLER_DIR = OUTPUT_BASE / "kepler_data"; KEPLER_DIR.mkdir(parents=True, exist_ok=True)
 PLOT_CRS = 3857
+# KPI cache lives outside the numbered run folders so repeat runs can reuse it
+CACHE_DIR = OUTPUT_BASE.parent / "cache"
+KPI_INPUTS = [
+    DATA_DIR/"city_boundary.geojson",
+    DATA_DIR/"districts_with_population.geojson",
+    DATA_DIR/"processed/landuse_categorized.parquet",
+    DATA_DIR/"processed/pt_stops_categorized.parquet",
+    DATA_DIR/"h3_population_res8.parquet",
+]
+# Bump when KPI semantics change outside the hashed compute_kpis source
+KPI_CACHE_VERSION = 1
 
 # ---------- Loaders ----------
-def _read_gdf(path: Path):
+def _read_gdf(path: Path, bbox=None):
+    """Read a vector/parquet layer; bbox=(minx,miny,maxx,maxy) in EPSG:4326 drops outside features"""
     if not path.exists(): return None
     try:
         if path.suffix.lower() in {".geojson",".json",".gpkg"}:
-            return gpd.read_file(path)
+            return gpd.read_file(path, engine="pyogrio", use_arrow=True, bbox=bbox)
         elif path.suffix.lower() == ".parquet":
-            # Read parquet and check if it has geometry column
-            df = pd.read_parquet(path)
-            if "geometry" in df.columns:
-                # Check if geometry column contains bytes (WKB format)
-                if df['geometry'].dtype == 'object' and isinstance(df['geometry'].iloc[0], bytes):
-                    # Convert WKB bytes to Shapely geometries
-                    from shapely import wkb
-                    df['geometry'] = df['geometry'].apply(lambda x: wkb.loads(x) if x is not None else None)
-                
-                # Convert to GeoDataFrame
-                return gpd.GeoDataFrame(df, geometry="geometry", crs=4326)
-            else:
-                return df
+            try:
+                # GeoParquet: geometry is decoded natively from the geo metadata
+                gdf = gpd.read_parquet(path)
+            except ValueError:
+                # Plain parquet without geo metadata; geometry (if any) is a WKB column
+                df = pd.read_parquet(path)
+                if "geometry" not in df.columns:
+                    return df
+                df['geometry'] = gpd.GeoSeries.from_wkb(df['geometry'], crs=4326)
+                gdf = gpd.GeoDataFrame(df, geometry="geometry", crs=4326)
+            if bbox is not None:
+                gdf = gdf.cx[bbox[0]:bbox[2], bbox[1]:bbox[3]]
+            return gdf
         else:
             return pd.read_parquet(path)
     except Exception as e:
         print(f"Error reading {path}: {e}")
         return None
 
+# Secondary OSM layers (name -> file under DATA_DIR); read with the city bbox filter
+SECONDARY_LAYERS = {
+    "landuse": "processed/landuse_categorized.parquet",
+    "cycle": "processed/cycle_categorized.parquet",
+    "roads": "processed/roads_categorized.parquet",
+    "pt_stops": "processed/pt_stops_categorized.parquet",
+}
+
 def load_layers():
+    boundary = _read_gdf(DATA_DIR/"city_boundary.geojson")
+    # secondary layers only need features inside the city
+    bbox = tuple(boundary.total_bounds) if boundary is not None else None
     layers = dict(
         districts=_read_gdf(DATA_DIR/"districts_with_population.geojson"),
-        landuse=_read_gdf(DATA_DIR/"processed/landuse_categorized.parquet"),
-        cycle=_read_gdf(DATA_DIR/"processed/cycle_categorized.parquet"),
-        roads=_read_gdf(DATA_DIR/"processed/roads_categorized.parquet"),
-        pt_stops=_read_gdf(DATA_DIR/"processed/pt_stops_categorized.parquet"),
-        boundary=_read_gdf(DATA_DIR/"city_boundary.geojson"),
+        boundary=boundary,
         h3_pop=pd.read_parquet(DATA_DIR/"h3_population_res8.parquet") if (DATA_DIR/"h3_population_res8.parquet").exists() else None,
     )
+    layers.update({name: _read_gdf(DATA_DIR/rel, bbox) for name, rel in SECONDARY_LAYERS.items()})
     # set CRS defaults only for GeoDataFrames
-    for k in ["districts","landuse","cycle","roads","pt_stops","boundary"]:
+    for k in ["districts", "boundary", *SECONDARY_LAYERS]:
         if layers[k] is not None and hasattr(layers[k], 'crs'):
             layers[k] = layers[k].set_crs(4326) if layers[k].crs is None else layers[k].to_crs(4326)
     return layers
@@ -103,6 +124,25 @@ def _extent_from(gdf):
     return tuple(gdf.to_crs(PLOT_CRS).total_bounds)
 
 # ---------- KPI computation (district level) ----------
+GREEN_LANDUSE = {"forest","meadow","grass","recreation_ground","park","cemetery","orchard","vineyard","allotments"}
+GREEN_NATURAL = {"wood","scrub","grassland","park"}
+
+def _green_mask(gdf):
+    """Vectorized green-feature test on the landuse/natural tags"""
+    mask = pd.Series(False, index=gdf.index)
+    for col, values in (("landuse", GREEN_LANDUSE), ("natural", GREEN_NATURAL)):
+        if col in gdf.columns:
+            mask |= gdf[col].astype("string").str.lower().isin(values)
+    return mask
+
+def _intersection_area(targets, sources):
+    """Per-target sum of intersection area with sources (STRtree over sources, prepared targets)"""
+    src = sources.geometry.to_numpy(); tgt = targets.geometry.to_numpy()
+    shapely.prepare(tgt)
+    ti, si = shapely.STRtree(src).query(tgt, predicate="intersects")
+    areas = shapely.area(shapely.intersection(src[si], tgt[ti]))
+    return pd.Series(np.bincount(ti, weights=areas, minlength=len(tgt)), index=targets.index)
+
 def compute_kpis(layers):
     if layers["districts"] is None: return None
     d = layers["districts"].to_crs(PLOT_CRS).copy()
@@ -110,10 +150,17 @@ def compute_kpis(layers):
     
     print(f"Processing {len(d)} districts...")
 
+    # Project each input layer once; the green polygons feed both the district and H3 blocks
+    pt_proj = layers["pt_stops"].to_crs(PLOT_CRS) if layers["pt_stops"] is not None else None
+    land_proj = None
+    if layers["landuse"] is not None:
+        land_proj = layers["landuse"].to_crs(PLOT_CRS)
+        land_proj = land_proj[land_proj.geometry.type.isin(["Polygon","MultiPolygon"])]
+        land_proj = land_proj[_green_mask(land_proj)]
+
     # PT stops
-    if layers["pt_stops"] is not None:
-        stops = layers["pt_stops"].to_crs(PLOT_CRS)
-        j = gpd.sjoin(stops, d[["geometry"]], predicate="within", how="left")
+    if pt_proj is not None:
+        j = gpd.sjoin(pt_proj, d[["geometry"]], predicate="within", how="left")
         cnt = j.groupby(j.index_right).size()
         d["pt_stops_count"] = d.index.map(cnt).fillna(0).astype(int)
         d["pt_stops_per_km2"] = d["pt_stops_count"]/d["area_km2"].replace(0,np.nan)
@@ -121,27 +168,9 @@ def compute_kpis(layers):
         d["pt_stops_count"]=0; d["pt_stops_per_km2"]=np.nan
 
     # Greens: area share (parks/forest/meadow/grass/etc.)
-    if layers["landuse"] is not None:
-        land = layers["landuse"].to_crs(PLOT_CRS)
-        land = land[land.geometry.type.isin(["Polygon","MultiPolygon"])].copy()
-        def is_green(row):
-            lu = str(row.get("landuse","")).lower()
-            nat= str(row.get("natural","")).lower()
-            return lu in {"forest","meadow","grass","recreation_ground","park","cemetery","orchard","vineyard","allotments"} \
-                or nat in {"wood","scrub","grassland","park"}
-        land = land[land.apply(is_green, axis=1)]
-        if len(land):
-            j = gpd.sjoin(land, d[["geometry"]], predicate="intersects", how="inner")
-            parts=[]
-            for di, sub in j.groupby(j.index_right):
-                inter_area=0.0
-                dpoly=d.loc[di,"geometry"]
-                for g in sub.geometry:
-                    inter = g.intersection(dpoly)
-                    if not inter.is_empty: inter_area += inter.area
-                parts.append((di, inter_area))
-            a = pd.DataFrame(parts, columns=["di","green_area_m2"]).set_index("di")["green_area_m2"]
-            d["green_area_km2"] = d.index.map(a).fillna(0)/1e6
+    if land_proj is not None:
+        if len(land_proj):
+            d["green_area_km2"] = _intersection_area(d, land_proj)/1e6
         else:
             d["green_area_km2"]=0.0
     else:
@@ -157,47 +186,26 @@ def compute_kpis(layers):
     d["pt_stops_per_1k"] = d["pt_stops_count"]/d["population"].replace(0,np.nan)*1000
 
     # H3 pop-weighted green m² per capita (requires h3_population_res8)
-    if layers["h3_pop"] is not None and layers["landuse"] is not None:
+    if layers["h3_pop"] is not None and land_proj is not None:
         # build hex polygons in 3857
         h3 = layers["h3_pop"]
-        polys = [hex_polygon(h) for h in h3["h3"]]
+        polys = hex_polygons(h3["h3"])
         hex_g = gpd.GeoDataFrame(h3[["h3","pop"]], geometry=polys, crs=4326).to_crs(PLOT_CRS)
         hex_g["area"] = hex_g.area
 
-        greens = layers["landuse"].to_crs(PLOT_CRS)
-        greens = greens[greens.geometry.type.isin(["Polygon","MultiPolygon"])].copy()
-        def is_green2(row):
-            lu = str(row.get("landuse","")).lower()
-            nat= str(row.get("natural","")).lower()
-            return lu in {"forest","meadow","grass","recreation_ground","park","cemetery","orchard","vineyard","allotments"} \
-                or nat in {"wood","scrub","grassland","park"}
-        greens = greens[greens.apply(is_green2, axis=1)]
+        greens = land_proj
 
         if len(greens):
             # green share per cell
-            jj = gpd.sjoin(greens, hex_g[["h3","pop","geometry"]], predicate="intersects", how="inner")
-            parts=[]
-            for h, sub in jj.groupby("h3"):
-                hpoly=hex_g.loc[hex_g["h3"]==h,"geometry"].iloc[0]; hA=hpoly.area
-                a=0.0
-                for g in sub.geometry:
-                    inter=g.intersection(hpoly)
-                    if not inter.is_empty: a+=inter.area
-                frac = a/hA if hA>0 else 0.0
-                parts.append((h, frac))
-            cell_share = pd.DataFrame(parts, columns=["h3","green_frac"]).set_index("h3")["green_frac"]
-            hex_g = hex_g.join(cell_share, on="h3"); hex_g["green_frac"]=hex_g["green_frac"].fillna(0)
+            hex_g["green_frac"] = (_intersection_area(hex_g, greens) / hex_g["area"].replace(0, np.nan)).fillna(0)
 
             # assign cell to district via centroid
             cent = gpd.GeoDataFrame(hex_g[["h3","pop"]], geometry=hex_g.geometry.centroid, crs=PLOT_CRS)
             jj2 = gpd.sjoin(cent, d[["geometry"]], predicate="within", how="left")
-            # pop-weighted average of green_frac
-            by = jj2.groupby(jj2.index_right).apply(
-                lambda t: np.average(
-                    hex_g.loc[t.index, "green_frac"].fillna(0),
-                    weights=np.maximum(hex_g.loc[t.index,"pop"].fillna(0).values, 0)
-                ) if len(t) else np.nan
-            )
+            # pop-weighted average of green_frac (numerator / denominator sums per district)
+            w = jj2["pop"].fillna(0).clip(lower=0)
+            num = hex_g["green_frac"].reindex(jj2.index).fillna(0) * w
+            by = num.groupby(jj2["index_right"]).sum() / w.groupby(jj2["index_right"]).sum().replace(0, np.nan)
             d["green_m2_per_capita"] = (by * hex_g["area"].mean())  # approximate m²/person proxy
         else:
             d["green_m2_per_capita"]=np.nan
@@ -216,6 +224,39 @@ def compute_kpis(layers):
     
     return d
 
+def _kpi_cache_key():
+    """md5 over KPI code + input paths/mtimes; an edited computation or touched input invalidates the cache"""
+    h = hashlib.md5(str(KPI_CACHE_VERSION).encode())
+    for fn in (compute_kpis, _green_mask, _intersection_area):
+        try: h.update(inspect.getsource(fn).encode())
+        except (OSError, TypeError): pass  # no source available: rely on KPI_CACHE_VERSION
+    for p in KPI_INPUTS:
+        h.update(str(p).encode())
+        h.update(str(p.stat().st_mtime_ns if p.exists() else -1).encode())
+    return h.hexdigest()
+
+def compute_kpis_cached(layers):
+    """compute_kpis with a GeoParquet cache keyed by the input file mtimes"""
+    cache_path = CACHE_DIR / f"district_kpis_{_kpi_cache_key()}.parquet"
+    if cache_path.exists():
+        try:
+            d = gpd.read_parquet(cache_path)
+            print(f"♻️ Reusing cached KPIs: {cache_path.name}")
+            return d
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable KPI cache {cache_path.name}: {e}")
+    d = compute_kpis(layers)
+    if d is not None:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            d.to_parquet(cache_path)
+            # Superseded keys are never read again
+            for stale in CACHE_DIR.glob("district_kpis_*.parquet"):
+                if stale != cache_path: stale.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"⚠️ Could not write KPI cache: {e}")
+    return d
+
 # ---------- Plot helpers ----------
 def _add_basemap(ax, extent):
     try: cx.add_basemap(ax, source=cx.providers.CartoDB.Positron, alpha=0.30, crs=PLOT_CRS)
@@ -382,7 +423,7 @@ def map_01_macro_green_pt(d, pt_stops, extent):
     colors = pal["greens"]
     q = vals.quantile(np.linspace(0,1,len(colors)+1)).values
     bins = np.clip(np.digitize(vals, q[1:-1], right=True), 0, len(colors)-1)
-    d_plot = d.to_crs(PLOT_CRS).copy()
+    d_plot = d.copy()
     d_plot["_color"] = [colors[i] for i in bins]
     d_plot.plot(ax=ax, color=d_plot["_color"], edgecolor="#555", linewidth=0.5)
     if pt_stops is not None:
@@ -412,7 +453,7 @@ def map_02_h3_population_surface(d, h3_pop, extent):
     fig, ax = plt.subplots(1,1, figsize=(20,12))
     
     # Create H3 hexagons
-    polys = [hex_polygon(h) for h in h3_pop["h3"]]
+    polys = hex_polygons(h3_pop["h3"])
     hex_g = gpd.GeoDataFrame(h3_pop[["h3","pop"]], geometry=polys, crs=4326).to_crs(PLOT_CRS)
     
     # Plot with population-based coloring
@@ -424,7 +465,7 @@ def map_02_h3_population_surface(d, h3_pop, extent):
     hex_g.plot(ax=ax, color=hex_g["_color"], edgecolor="#555", linewidth=0.3, alpha=0.8)
     
     # Add district boundaries
-    d.to_crs(PLOT_CRS).boundary.plot(ax=ax, color="#333", linewidth=1.5)
+    d.boundary.plot(ax=ax, color="#333", linewidth=1.5)
     
     _add_basemap(ax, extent)
     apply_style(ax, extent)
@@ -451,18 +492,13 @@ def map_03_green_space_distribution(d, landuse, extent):
     
     # Filter green features
     greens = landuse[landuse.geometry.type.isin(["Polygon","MultiPolygon"])].copy()
-    def is_green(row):
-        lu = str(row.get("landuse","")).lower()
-        nat = str(row.get("natural","")).lower()
-        return lu in {"forest","meadow","grass","recreation_ground","park","cemetery","orchard","vineyard","allotments"} \
-            or nat in {"wood","scrub","grassland","park"}
-    greens = greens[greens.apply(is_green, axis=1)]
+    greens = greens[_green_mask(greens)]
     
     # Plot green areas
     greens.to_crs(PLOT_CRS).plot(ax=ax, color="#2d5a27", alpha=0.7, edgecolor="#1a3d1a", linewidth=0.5)
     
     # Add district boundaries
-    d.to_crs(PLOT_CRS).boundary.plot(ax=ax, color="#333", linewidth=1.5)
+    d.boundary.plot(ax=ax, color="#333", linewidth=1.5)
     
     _add_basemap(ax, extent)
     apply_style(ax, extent)
@@ -500,24 +536,17 @@ def map_04_bivariate_green_vs_pt(d, extent):
     
     # Create continuous bivariate colors using a smooth gradient
     # Red channel: PT stops (X), Blue channel: Green area (Y), Green channel: mix
-    colors = []
-    for x, y in zip(X_norm, Y_norm):
-        # Create smooth color transition
-        # Red increases with PT stops, Blue increases with green area
-        red = x * 0.8 + 0.2  # 0.2 to 1.0
-        blue = y * 0.8 + 0.2  # 0.2 to 1.0
-        green = (x + y) * 0.3 + 0.1  # 0.1 to 0.7 (darker mix)
-        
-        # Ensure values are in valid range
-        red = max(0, min(1, red))
-        blue = max(0, min(1, blue))
-        green = max(0, min(1, green))
-        
-        colors.append((red, green, blue))
+    x = X_norm.to_numpy(dtype=float); y = Y_norm.to_numpy(dtype=float)
+    rgb = np.column_stack([
+        x * 0.8 + 0.2,        # red: PT stops, 0.2 to 1.0
+        (x + y) * 0.3 + 0.1,  # green: darker mix, 0.1 to 0.7
+        y * 0.8 + 0.2,        # blue: green area, 0.2 to 1.0
+    ]).clip(0, 1)
+    colors = list(map(tuple, rgb))
     
     # Larger dimensions with right-side white column
     fig, ax = plt.subplots(1,1, figsize=(20,12))
-    d_plot = d.to_crs(PLOT_CRS).copy()
+    d_plot = d.copy()
     d_plot["_color"] = colors
     d_plot.plot(ax=ax, color=d_plot["_color"], edgecolor="#555", linewidth=0.6)
     _add_basemap(ax, extent)
@@ -594,7 +623,7 @@ def map_05_pt_stop_density(d, pt_stops, extent):
     colors = palette()["purples"]
     q = vals.quantile(np.linspace(0,1,len(colors)+1)).values
     bins = np.clip(np.digitize(vals, q[1:-1], right=True), 0, len(colors)-1)
-    d_plot = d.to_crs(PLOT_CRS).copy()
+    d_plot = d.copy()
     d_plot["_color"] = [colors[i] for i in bins]
     d_plot.plot(ax=ax, color=d_plot["_color"], edgecolor="#555", linewidth=0.5)
     
@@ -629,18 +658,18 @@ def map_06_area_vs_population(d, extent):
     X = d["area_km2"].astype(float)
     Y = (d["population"]/d["area_km2"]).replace([np.inf,-np.inf], np.nan)
     qx = X.quantile([1/3, 2/3]).values; qy = Y.quantile([1/3, 2/3]).values
-    def binv(v, qs): 
-        return 0 if v<=qs[0] else (1 if v<=qs[1] else 2)
-    bins = [ (binv(x,qx), binv(y,qy)) for x,y in zip(X,Y) ]
+    # tercile bins: 0 (<= q1/3), 1 (<= q2/3), 2 (above, incl. NaN)
+    xb = np.digitize(X.to_numpy(), qx, right=True); yb = np.digitize(Y.to_numpy(), qy, right=True)
     
     BIV = {
         (0,0): "#e8e8e8",(1,0):"#ace4e4",(2,0):"#5ac8c8",
         (0,1): "#dfb0d6",(1,1):"#a5add3",(2,1):"#5698b9",
         (0,2): "#be64ac",(1,2):"#8c62aa",(2,2):"#3b4994",
     }
-    col = [BIV.get(b,"#cccccc") for b in bins]
+    biv_lut = np.array([[BIV[(i,j)] for j in range(3)] for i in range(3)])
+    col = biv_lut[xb, yb]
     
-    d_plot = d.to_crs(PLOT_CRS).copy()
+    d_plot = d.copy()
     d_plot["_color"] = col
     d_plot.plot(ax=ax, color=d_plot["_color"], edgecolor="#555", linewidth=0.6)
     
@@ -668,7 +697,7 @@ def map_07_h3_hexbin_visualization(d, h3_pop, extent):
     fig, ax = plt.subplots(1,1, figsize=(20,12))
     
     # Create H3 hexagons with population-based sizing
-    polys = [hex_polygon(h) for h in h3_pop["h3"]]
+    polys = hex_polygons(h3_pop["h3"])
     hex_g = gpd.GeoDataFrame(h3_pop[["h3","pop"]], geometry=polys, crs=4326).to_crs(PLOT_CRS)
     
     # Plot with population-based sizing and coloring
@@ -687,7 +716,7 @@ def map_07_h3_hexbin_visualization(d, h3_pop, extent):
         ))
     
     # Add district boundaries
-    d.to_crs(PLOT_CRS).boundary.plot(ax=ax, color="#333", linewidth=1.5)
+    d.boundary.plot(ax=ax, color="#333", linewidth=1.5)
     
     _add_basemap(ax, extent)
     apply_style(ax, extent)
@@ -719,7 +748,7 @@ def map_08_combined_accessibility_score(d, extent):
     colors = palette()["viridis"]
     q = vals.quantile(np.linspace(0,1,len(colors)+1)).values
     bins = np.clip(np.digitize(vals, q[1:-1], right=True), 0, len(colors)-1)
-    d_plot = d.to_crs(PLOT_CRS).copy()
+    d_plot = d.copy()
     d_plot["_color"] = [colors[i] for i in bins]
     d_plot.plot(ax=ax, color=d_plot["_color"], edgecolor="#555", linewidth=0.5)
     
@@ -874,9 +903,9 @@ def map_14_service_diversity_h3(d_kpi, layers, extent):
     ax.set_ylim(extent[1], extent[3])
     
     # Create H3 grid
-    from h3_utils import hex_polygon
+    from h3_utils import hex_polygons
     h3_pop = layers["h3_pop"]
-    h3_polys = [hex_polygon(h) for h in h3_pop["h3"]]
+    h3_polys = hex_polygons(h3_pop["h3"])
     h3_gdf = gpd.GeoDataFrame(h3_pop, geometry=h3_polys, crs=4326).to_crs(3857)
     
     # Calculate service diversity for each H3 cell
@@ -1012,8 +1041,8 @@ def export_kepler_layers(layers, d_kpi):
         if layers["h3_pop"] is not None:
             h3_pop = layers["h3_pop"]
             # Convert H3 to polygons
-            from h3_utils import hex_polygon
-            h3_polys = [hex_polygon(h) for h in h3_pop["h3"]]
+            from h3_utils import hex_polygons
+            h3_polys = hex_polygons(h3_pop["h3"])
             h3_kepler = gpd.GeoDataFrame(h3_pop, geometry=h3_polys, crs=4326)
             h3_kepler.to_file(KEPLER_DIR / "05_h3_population.geojson", driver='GeoJSON')
             print("  ✅ H3 population exported")
@@ -1072,7 +1101,7 @@ def main():
     boundary = layers["boundary"] if layers["boundary"] is not None else layers["districts"]
     extent = _extent_from(boundary)
 
-    d_kpi = compute_kpis(layers)
+    d_kpi = compute_kpis_cached(layers)
     if d_kpi is None:
         print("❌ Could not compute KPIs.")
         return
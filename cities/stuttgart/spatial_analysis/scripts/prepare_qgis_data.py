@@ -2,10 +2,14 @@
 """
 Prepare Data for QGIS using DuckDB
 Converts parquet files to GeoJSON and organizes them for QGIS import
+
+The parquet inputs are scanned with read_parquet() and copied straight to
+disk through a single in-memory DuckDB connection; no database file is
+opened, so this never contends for the writer lock on stuttgart_analysis.duckdb.
 """
 
+import os
 import duckdb
-import pandas as pd
 from pathlib import Path
 import json
 
@@ -13,6 +17,21 @@ import json
 DATA_DIR = Path("../data")
 OUTPUT_DIR = Path("../outputs/qgis_ready_data")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+DUCKDB_MEMORY_LIMIT = "4GB"
+
+def _configure(con):
+    """Load the spatial extension and apply session pragmas"""
+    try:
+        con.execute("INSTALL spatial")
+    except duckdb.Error as e:
+        # Offline: fall back to an already installed extension
+        print(f"⚠️  Could not install spatial extension: {e}")
+    con.execute("LOAD spatial")
+    
+    # Match local cores, cap memory for large exports, keep parquet metadata cached
+    con.execute(f"PRAGMA threads={os.cpu_count() or 4}")
+    con.execute(f"PRAGMA memory_limit='{DUCKDB_MEMORY_LIMIT}'")
+    con.execute("PRAGMA enable_object_cache=true")
 
 def setup_duckdb():
     """Setup DuckDB with spatial extensions"""
@@ -21,44 +40,47 @@ def setup_duckdb():
     # Connect to DuckDB
     con = duckdb.connect(':memory:')
     
-    # Load spatial extension
-    con.execute("INSTALL spatial")
-    con.execute("LOAD spatial")
+    # Load spatial extension and session settings
+    _configure(con)
     
     print("✅ DuckDB spatial extension loaded")
     return con
 
+def get_parquet_columns(con, parquet_path):
+    """List column names from the parquet footer without scanning any data"""
+    rows = con.execute(
+        "SELECT name FROM parquet_schema(?)", [str(parquet_path)]
+    ).fetchall()
+    return [row[0] for row in rows]
+
 def convert_parquet_to_geojson(con, parquet_path, output_name, geometry_column="geometry"):
     """Convert parquet file to GeoJSON using DuckDB"""
     print(f"🔄 Converting {parquet_path.name} to GeoJSON...")
     
     try:
-        # Read parquet file
-        df = pd.read_parquet(parquet_path)
-        
-        # Check if geometry column exists
-        if geometry_column not in df.columns:
-            print(f"⚠️  No geometry column found in {parquet_path.name}")
-            return None
-        
-        # Convert to DuckDB table
-        con.execute("CREATE TABLE temp_data AS SELECT * FROM df")
+        # Check if geometry column exists (schema only, no row data read)
+        if geometry_column not in get_parquet_columns(con, parquet_path):
+            print(f"⚠️  No geometry column found in {parquet_path.name}, exporting CSV")
+            output_path = OUTPUT_DIR / f"{output_name}.csv"
+            con.execute(f"""
+                COPY (SELECT * FROM read_parquet('{parquet_path}'))
+                TO '{output_path}' (FORMAT CSV, HEADER)
+            """)
+            print(f"✅ Saved: {output_path}")
+            return output_path
         
         # Export to GeoJSON
         output_path = OUTPUT_DIR / f"{output_name}.geojson"
         
-        # Use DuckDB to export with proper geometry handling
+        # Stream straight from the parquet file - no pandas or staging table
         con.execute(f"""
             COPY (
-                SELECT * FROM temp_data 
+                SELECT * FROM read_parquet('{parquet_path}')
                 WHERE {geometry_column} IS NOT NULL
             ) TO '{output_path}' 
             WITH (FORMAT GDAL, DRIVER 'GeoJSON')
         """)
         
-        # Clean up temp table
-        con.execute("DROP TABLE temp_data")
-        
         print(f"✅ Saved: {output_path}")
         return output_path
         
@@ -204,9 +226,6 @@ def main():
     print("🚀 Preparing Data for QGIS...")
     print("=" * 50)
     
-    # Setup DuckDB
-    con = setup_duckdb()
-    
     # Prepare districts (already GeoJSON)
     districts_file = prepare_districts_data()
     
@@ -217,14 +236,16 @@ def main():
         (DATA_DIR / "processed/pt_stops_categorized.parquet", "04_pt_stops"),
     ]
     
+    # One DuckDB connection for all conversions, closed on exit
     converted_files = []
-    for parquet_path, output_name in data_files:
-        if parquet_path.exists():
-            result = convert_parquet_to_geojson(con, parquet_path, output_name)
-            if result:
-                converted_files.append(result)
-        else:
-            print(f"⚠️  File not found: {parquet_path}")
+    with setup_duckdb() as con:
+        for parquet_path, output_name in data_files:
+            if parquet_path.exists():
+                result = convert_parquet_to_geojson(con, parquet_path, output_name)
+                if result:
+                    converted_files.append(result)
+            else:
+                print(f"⚠️  File not found: {parquet_path}")
     
     # Create QGIS project config
     project_config = create_qgis_project_file()
@@ -232,9 +253,6 @@ def main():
     # Create README
     create_readme()
     
-    # Close DuckDB connection
-    con.close()
-    
     print("\n" + "=" * 50)
     print("🎉 QGIS Data Preparation Complete!")
     print(f"📁 Output directory: {OUTPUT_DIR}")
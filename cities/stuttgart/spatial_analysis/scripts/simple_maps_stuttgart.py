@@ -14,7 +14,7 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import contextily as cx
-from shapely import wkb
+import shapely
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -74,7 +74,7 @@ def load_layers():
                 # Check if geometry column contains bytes (WKB format)
                 if layers[k]['geometry'].dtype == 'object' and isinstance(layers[k]['geometry'].iloc[0], bytes):
                     # Convert WKB bytes to Shapely geometries
-                    layers[k]['geometry'] = layers[k]['geometry'].apply(lambda x: wkb.loads(x) if x is not None else None)
+                    layers[k]['geometry'] = shapely.from_wkb(layers[k]['geometry'].to_numpy())
                 
                 # Convert to GeoDataFrame if it has geometry
                 layers[k] = gpd.GeoDataFrame(layers[k], geometry='geometry', crs=4326)
@@ -34,7 +34,7 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import contextily as cx
 from shapely.geometry import Point, box, Polygon, LineString
-from shapely import wkb
+import shapely
 import jinja2  # (usado no dashboard)
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -119,7 +119,7 @@ def load_data():
                     # Handle WKB geometry data
                     try:
                         # Try to convert WKB to shapely geometries
-                        df['geometry'] = df['geometry'].apply(lambda x: wkb.loads(x) if x else None)
+                        df['geometry'] = shapely.from_wkb(df['geometry'].to_numpy())
                         return gpd.GeoDataFrame(df, geometry='geometry', crs=4326)
                     except Exception as wkb_error:
                         print(f"  ⚠️ WKB conversion failed for {p.name}: {wkb_error}")
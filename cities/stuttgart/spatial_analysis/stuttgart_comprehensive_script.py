@@ -85,8 +85,8 @@ def load_data():
                 df = pd.read_parquet(p)
                 if "geometry" in df.columns:
                     if df['geometry'].dtype == 'object' and isinstance(df['geometry'].iloc[0], bytes):
-                        from shapely import wkb
-                        df['geometry'] = df['geometry'].apply(lambda x: wkb.loads(x) if x is not None else None)
+                        import shapely
+                        df['geometry'] = shapely.from_wkb(df['geometry'].to_numpy())
                     return gpd.GeoDataFrame(df, geometry="geometry", crs=4326)
                 else:
                     return df
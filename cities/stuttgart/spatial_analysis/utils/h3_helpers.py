@@ -1,10 +1,15 @@
 # utils/h3_helpers.py
 from __future__ import annotations
 from typing import Iterable, Set
+import numpy as np
 import geopandas as gpd
+import shapely
+from pyproj import CRS
 from shapely.geometry import Polygon, MultiPolygon, base
 import h3
 
+WGS84 = CRS.from_epsg(4326)
+
 def polygon_geom_to_h3_cells(geom: base.BaseGeometry, res: int) -> Set[str]:
     """
     Convert a shapely Polygon/MultiPolygon in EPSG:4326 to a set of H3 cells.
@@ -61,12 +66,25 @@ def h3_to_shapely_geometry(h3_index: str) -> Polygon:
     coords_lon_lat = [(lon, lat) for lat, lon in coords]
     return Polygon(coords_lon_lat)
 
+def h3_cells_to_polygons(h3_indexes: Iterable[str]) -> np.ndarray:
+    """
+    Convert many H3 indexes to Shapely polygons with one vectorized constructor call.
+    """
+    boundaries = [h3.cell_to_boundary(h) for h in h3_indexes]
+    if not boundaries:
+        return np.empty(0, dtype=object)
+    # Rings are ragged (pentagons / edge-crossing cells), so pass ring ids per vertex
+    counts = np.fromiter((len(b) for b in boundaries), dtype=np.intp, count=len(boundaries))
+    lat_lon = np.asarray([pt for b in boundaries for pt in b], dtype=float)
+    rings = shapely.linearrings(lat_lon[:, ::-1], indices=np.repeat(np.arange(len(boundaries)), counts))
+    return shapely.polygons(rings)
+
 def gdf_polygons_to_h3(gdf: gpd.GeoDataFrame, res: int) -> Set[str]:
     """
     Ensure CRS=EPSG:4326, then union all polygon cells.
     """
     g = gdf
-    if g.crs is None or str(g.crs).upper() not in ("EPSG:4326", "EPSG: 4326"):
+    if g.crs is None or g.crs != WGS84:
         g = g.to_crs(4326)
     
     cells: Set[str] = set()
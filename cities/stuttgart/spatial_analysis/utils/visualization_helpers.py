@@ -4,18 +4,64 @@ Visualization Helpers - Utility module for generating maps, rankings and reports
 """
 
 import logging
+import os
+import re
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import shapely
 from pathlib import Path
-from typing import Dict, List, Any
-import folium
-from folium import plugins
-import json
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+
+# matplotlib.pyplot and folium are imported inside the map/dashboard functions,
+# so ranking/report-only callers don't pay their import cost
+if TYPE_CHECKING:
+    import folium
+
+try:
+    import pyogrio  # noqa: F401
+    PYOGRIO_AVAILABLE = True
+except ImportError:
+    PYOGRIO_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Columns read downstream from each KPI table (maps + report summaries);
+# None keeps every column, since the rankings select columns by name pattern
+REQUIRED_COLS: Dict[str, Optional[List[str]]] = {
+    "transport_kpis": ["district_id", "population_300m_pt", "pt_stops_count"],
+    "walkability_kpis": ["district_id", "walkability_score", "intersection_density"],
+    "green_kpis": ["district_id", "green_accessibility_score", "greenspace_area_ha"],
+    "district_kpis_aggregated": None,
+}
+
+# Source key (file, columns, mtime, size) of each frame handed out by the cached
+# loaders, by id(); entries are dropped when the frame is garbage collected
+_FRAME_SOURCES: Dict[int, tuple] = {}
+
+# Merged districts+KPI frames, keyed on the sources of the joined frames and
+# bounded LRU-style; per process, so map jobs in the process pool don't share it
+_MERGE_CACHE: "OrderedDict[tuple, gpd.GeoDataFrame]" = OrderedDict()
+MERGE_CACHE_SIZE = 4
+
+# Ranking category of a KPI column, by name; a column may match several categories
+RANKING_COLUMN_RE = re.compile(r'(?P<transport>pt_|transport)|(?P<walkability>walkability|intersection)|(?P<green>green)', re.I)
+
+# Metric CRS for Stuttgart geometry operations (UTM zone 32N)
+METRIC_CRS = "EPSG:25832"
+
+# Polygon fills are rasterized at this dpi; titles/legends stay vector in PDF/SVG output
+MAP_DPI = 150
+
 def generate_thematic_maps(config: Dict[str, Any]) -> None:
     """
     Generate thematic maps for different KPI categories
@@ -37,17 +83,18 @@ def generate_thematic_maps(config: Dict[str, Any]) -> None:
         walkability_kpis = load_kpi_results("walkability_kpis")
         green_kpis = load_kpi_results("green_kpis")
         
-        # Generate transport maps
-        if not transport_kpis.empty:
-            generate_transport_maps(districts, transport_kpis, config)
-        
-        # Generate walkability maps
-        if not walkability_kpis.empty:
-            generate_walkability_maps(districts, walkability_kpis, config)
-        
-        # Generate green area maps
-        if not green_kpis.empty:
-            generate_green_maps(districts, green_kpis, config)
+        # Transport, walkability and green area maps share no state; render them in parallel
+        jobs = [
+            (generate_transport_maps, transport_kpis),
+            (generate_walkability_maps, walkability_kpis),
+            (generate_green_maps, green_kpis),
+        ]
+        jobs = [(map_fn, kpis) for map_fn, kpis in jobs if not kpis.empty]
+        if jobs:
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+                futures = [pool.submit(map_fn, districts, kpis, config) for map_fn, kpis in jobs]
+                for future in futures:
+                    future.result()
         
         logger.info("Thematic maps generated successfully")
         
@@ -71,10 +118,11 @@ def create_ranking_tables(config: Dict[str, Any]) -> None:
             logger.warning("No aggregated KPI data available for rankings")
             return
         
-        # Create different ranking tables
-        create_transport_rankings(aggregated_kpis, config)
-        create_walkability_rankings(aggregated_kpis, config)
-        create_green_rankings(aggregated_kpis, config)
+        # Create different ranking tables (columns grouped in one pass)
+        ranking_cols = group_ranking_columns(aggregated_kpis.columns)
+        create_transport_rankings(aggregated_kpis, config, ranking_cols['transport'])
+        create_walkability_rankings(aggregated_kpis, config, ranking_cols['walkability'])
+        create_green_rankings(aggregated_kpis, config, ranking_cols['green'])
         create_overall_rankings(aggregated_kpis, config)
         
         logger.info("Ranking tables created successfully")
@@ -94,7 +142,7 @@ def build_interactive_dashboard(config: Dict[str, Any]) -> None:
     try:
         # Load data
         districts = load_district_boundaries(config)
-        aggregated_kpis = load_kpi_results("district_kpis_aggregated")
+        aggregated_kpis = load_kpi_results("district_kpis_aggregated", columns=["district_id", "weighted_total_score"])
         
         if districts is None or aggregated_kpis.empty:
             logger.error("Required data not available for dashboard")
@@ -122,7 +170,7 @@ def generate_final_report(config: Dict[str, Any]) -> None:
     
     try:
         # Load all data
-        aggregated_kpis = load_kpi_results("district_kpis_aggregated")
+        aggregated_kpis = load_kpi_results("district_kpis_aggregated", columns=["district_id", "weighted_total_score"])
         transport_kpis = load_kpi_results("transport_kpis")
         walkability_kpis = load_kpi_results("walkability_kpis")
         green_kpis = load_kpi_results("green_kpis")
@@ -146,36 +194,96 @@ def generate_final_report(config: Dict[str, Any]) -> None:
 
 # Helper functions for map generation
 
+DISTRICTS_PATH = Path("data/processed/stuttgart_districts.geojson")
+
+def _tag_source(df: pd.DataFrame, source: tuple) -> pd.DataFrame:
+    """Record which cached source a loader's (shallow) copy came from"""
+    key = id(df)
+    _FRAME_SOURCES[key] = source
+    weakref.finalize(df, _FRAME_SOURCES.pop, key, None)
+    return df
+
+@lru_cache(maxsize=1)
+def _read_district_boundaries() -> Optional[gpd.GeoDataFrame]:
+    """Read the district boundary file once per process"""
+    districts_path = DISTRICTS_PATH
+    if districts_path.exists():
+        if PYOGRIO_AVAILABLE:
+            # Vectorized GDAL read of just the join key + geometry
+            districts = gpd.read_file(districts_path, engine="pyogrio", columns=['district_id'])
+        else:
+            districts = gpd.read_file(districts_path)
+        # Categorical join key: KPI merges then match on integer codes
+        districts['district_id'] = districts['district_id'].astype('category')
+        return districts
+    logger.warning("District boundaries not found")
+    return None
+
+@lru_cache(maxsize=16)
+def _read_kpi_table(kpi_path: Path, columns: Optional[tuple], mtime_ns: int, size: int) -> pd.DataFrame:
+    """Read (a projection of) one KPI table; (mtime_ns, size) in the key invalidates rewritten files"""
+    dataset = ds.dataset(kpi_path, format="parquet")
+    wanted = columns
+    if wanted is not None:
+        # Project only columns present in the file; summaries check for missing ones
+        wanted = [col for col in wanted if col in dataset.schema.names]
+    df = dataset.to_table(columns=wanted).to_pandas()
+    if 'district_id' in df.columns:
+        df['district_id'] = df['district_id'].astype('category')
+    return df
+
 def load_district_boundaries(config: Dict[str, Any]) -> gpd.GeoDataFrame:
     """Load district boundary data"""
     try:
-        districts_path = Path("data/processed/stuttgart_districts.geojson")
-        if districts_path.exists():
-            return gpd.read_file(districts_path)
-        else:
-            logger.warning("District boundaries not found")
+        districts = _read_district_boundaries()
+        if districts is None:
             return None
+        # Shallow copy so callers cannot mutate the cached frame
+        return _tag_source(districts.copy(deep=False), (str(DISTRICTS_PATH),))
     except Exception as e:
         logger.error(f"Error loading district boundaries: {e}")
         return None
 
-def load_kpi_results(kpi_type: str) -> pd.DataFrame:
-    """Load KPI results from data/results folder"""
+def merge_district_kpis(districts: gpd.GeoDataFrame, kpis: pd.DataFrame) -> gpd.GeoDataFrame:
+    """Left-join KPIs onto districts, sharing the districts' categorical district_id dtype"""
+    # Only frames straight from the cached loaders have a source key; others are merged every time
+    sources = (_FRAME_SOURCES.get(id(districts)), _FRAME_SOURCES.get(id(kpis)))
+    key = sources if None not in sources else None
+    if key is not None and key in _MERGE_CACHE:
+        _MERGE_CACHE.move_to_end(key)
+        return _MERGE_CACHE[key].copy(deep=False)
+    joined = kpis.assign(district_id=kpis['district_id'].astype(districts['district_id'].dtype))
+    merged = districts.merge(joined, on='district_id', how='left')
+    if key is not None:
+        _MERGE_CACHE[key] = merged
+        if len(_MERGE_CACHE) > MERGE_CACHE_SIZE:
+            _MERGE_CACHE.popitem(last=False)
+    return merged.copy(deep=False)
+
+def load_kpi_results(kpi_type: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load KPI results from data/results folder, reading only the columns used downstream"""
+    kpi_path = Path(f"data/results/{kpi_type}.parquet")
     try:
-        kpi_path = Path(f"data/results/{kpi_type}.parquet")
-        if kpi_path.exists():
-            return pd.read_parquet(kpi_path)
-        else:
-            return pd.DataFrame()
-    except Exception as e:
+        # A single stat() decides between a cache hit and a re-read
+        st = kpi_path.stat()
+    except FileNotFoundError:
+        return pd.DataFrame()
+    try:
+        wanted = columns if columns is not None else REQUIRED_COLS.get(kpi_type)
+        source = (str(kpi_path), tuple(wanted) if wanted is not None else None, st.st_mtime_ns, st.st_size)
+        df = _read_kpi_table(kpi_path, *source[1:])
+        return _tag_source(df.copy(deep=False), source)
+    except (OSError, pa.ArrowInvalid) as e:
         logger.warning(f"Could not load {kpi_type}: {e}")
         return pd.DataFrame()
 
 def generate_transport_maps(districts: gpd.GeoDataFrame, transport_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
     """Generate transport-related thematic maps"""
+    import matplotlib.pyplot as plt
+    
     try:
         # Merge districts with transport KPIs
-        districts_with_kpis = districts.merge(transport_kpis, on='district_id', how='left')
+        districts_with_kpis = merge_district_kpis(districts, transport_kpis)
         
         # Create transport accessibility map
         fig, ax = plt.subplots(1, 1, figsize=(12, 10))
@@ -193,10 +301,7 @@ def generate_transport_maps(districts: gpd.GeoDataFrame, transport_kpis: pd.Data
         ax.axis('off')
         
         # Save map
-        output_path = Path("spatialviz/outputs/maps/transport_accessibility.png")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        save_choropleth(ax, Path("spatialviz/outputs/maps/transport_accessibility.png"))
         
         logger.info("Transport accessibility map generated")
         
@@ -205,9 +310,11 @@ def generate_transport_maps(districts: gpd.GeoDataFrame, transport_kpis: pd.Data
 
 def generate_walkability_maps(districts: gpd.GeoDataFrame, walkability_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
     """Generate walkability-related thematic maps"""
+    import matplotlib.pyplot as plt
+    
     try:
         # Merge districts with walkability KPIs
-        districts_with_kpis = districts.merge(walkability_kpis, on='district_id', how='left')
+        districts_with_kpis = merge_district_kpis(districts, walkability_kpis)
         
         # Create walkability score map
         fig, ax = plt.subplots(1, 1, figsize=(12, 10))
@@ -225,10 +332,7 @@ def generate_walkability_maps(districts: gpd.GeoDataFrame, walkability_kpis: pd.
         ax.axis('off')
         
         # Save map
-        output_path = Path("spatialviz/outputs/maps/walkability_score.png")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        save_choropleth(ax, Path("spatialviz/outputs/maps/walkability_score.png"))
         
         logger.info("Walkability score map generated")
         
@@ -237,9 +341,11 @@ def generate_walkability_maps(districts: gpd.GeoDataFrame, walkability_kpis: pd.
 
 def generate_green_maps(districts: gpd.GeoDataFrame, green_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
     """Generate green area-related thematic maps"""
+    import matplotlib.pyplot as plt
+    
     try:
         # Merge districts with green KPIs
-        districts_with_kpis = districts.merge(green_kpis, on='district_id', how='left')
+        districts_with_kpis = merge_district_kpis(districts, green_kpis)
         
         # Create green accessibility map
         fig, ax = plt.subplots(1, 1, figsize=(12, 10))
@@ -257,84 +363,96 @@ def generate_green_maps(districts: gpd.GeoDataFrame, green_kpis: pd.DataFrame, c
         ax.axis('off')
         
         # Save map
-        output_path = Path("spatialviz/outputs/maps/green_accessibility.png")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        save_choropleth(ax, Path("spatialviz/outputs/maps/green_accessibility.png"))
         
         logger.info("Green accessibility map generated")
         
     except Exception as e:
         logger.error(f"Error generating green maps: {e}")
 
+def save_choropleth(ax, output_path: Path) -> None:
+    """Rasterize the district polygon fills and save the figure"""
+    import matplotlib.pyplot as plt
+    
+    for collection in ax.collections:
+        collection.set_rasterized(True)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    ax.figure.savefig(output_path, dpi=MAP_DPI, bbox_inches='tight')
+    plt.close(ax.figure)
+
 # Helper functions for ranking tables
 
-def create_transport_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
+def group_ranking_columns(columns) -> Dict[str, List[str]]:
+    """Group KPI column names into transport/walkability/green with one regex scan per column"""
+    groups: Dict[str, List[str]] = {'transport': [], 'walkability': [], 'green': []}
+    for col in columns:
+        for category in {m.lastgroup for m in RANKING_COLUMN_RE.finditer(col)}:
+            groups[category].append(col)
+    return groups
+
+def add_rank_columns(aggregated_kpis: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+    """Return district_id + cols, plus a descending '<col>_rank' for each numeric column"""
+    ranks = (
+        aggregated_kpis[cols]
+        .select_dtypes(include=[np.number])
+        .rank(ascending=False, method='min')
+        .add_suffix('_rank')
+    )
+    return pd.concat([aggregated_kpis[['district_id'] + cols], ranks], axis=1)
+
+def save_rankings(rankings: pd.DataFrame, name: str) -> None:
+    """Write a rankings table as CSV (for reading) and zstd Parquet (for later pipeline stages)"""
+    output_dir = Path("spatialviz/outputs/rankings")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(rankings, preserve_index=False)
+    pa_csv.write_csv(table, output_dir / f"{name}.csv")
+    pq.write_table(table, output_dir / f"{name}.parquet", compression="zstd", compression_level=3)
+
+def create_transport_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any],
+                              transport_cols: Optional[List[str]] = None) -> None:
     """Create transport rankings table"""
     try:
         # Select transport-related columns
-        transport_cols = [col for col in aggregated_kpis.columns if 'pt_' in col or 'transport' in col.lower()]
-        transport_cols = ['district_id'] + transport_cols
-        
-        transport_rankings = aggregated_kpis[transport_cols].copy()
-        
-        # Add rankings
-        for col in transport_cols[1:]:
-            if aggregated_kpis[col].dtype in ['int64', 'float64']:
-                transport_rankings[f'{col}_rank'] = aggregated_kpis[col].rank(ascending=False, method='min')
+        if transport_cols is None:
+            transport_cols = group_ranking_columns(aggregated_kpis.columns)['transport']
+        transport_rankings = add_rank_columns(aggregated_kpis, transport_cols)
         
         # Save rankings
-        output_path = Path("spatialviz/outputs/rankings/transport_rankings.csv")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        transport_rankings.to_csv(output_path, index=False)
+        save_rankings(transport_rankings, "transport_rankings")
         
         logger.info("Transport rankings created")
         
     except Exception as e:
         logger.error(f"Error creating transport rankings: {e}")
 
-def create_walkability_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
+def create_walkability_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any],
+                                walkability_cols: Optional[List[str]] = None) -> None:
     """Create walkability rankings table"""
     try:
         # Select walkability-related columns
-        walkability_cols = [col for col in aggregated_kpis.columns if 'walkability' in col.lower() or 'intersection' in col.lower()]
-        walkability_cols = ['district_id'] + walkability_cols
-        
-        walkability_rankings = aggregated_kpis[walkability_cols].copy()
-        
-        # Add rankings
-        for col in walkability_cols[1:]:
-            if aggregated_kpis[col].dtype in ['int64', 'float64']:
-                walkability_rankings[f'{col}_rank'] = aggregated_kpis[col].rank(ascending=False, method='min')
+        if walkability_cols is None:
+            walkability_cols = group_ranking_columns(aggregated_kpis.columns)['walkability']
+        walkability_rankings = add_rank_columns(aggregated_kpis, walkability_cols)
         
         # Save rankings
-        output_path = Path("spatialviz/outputs/rankings/walkability_rankings.csv")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        walkability_rankings.to_csv(output_path, index=False)
+        save_rankings(walkability_rankings, "walkability_rankings")
         
         logger.info("Walkability rankings created")
         
     except Exception as e:
         logger.error(f"Error creating walkability rankings: {e}")
 
-def create_green_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
+def create_green_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any],
+                          green_cols: Optional[List[str]] = None) -> None:
     """Create green area rankings table"""
     try:
         # Select green area-related columns
-        green_cols = [col for col in aggregated_kpis.columns if 'green' in col.lower()]
-        green_cols = ['district_id'] + green_cols
-        
-        green_rankings = aggregated_kpis[green_cols].copy()
-        
-        # Add rankings
-        for col in green_cols[1:]:
-            if aggregated_kpis[col].dtype in ['int64', 'float64']:
-                green_rankings[f'{col}_rank'] = aggregated_kpis[col].rank(ascending=False, method='min')
+        if green_cols is None:
+            green_cols = group_ranking_columns(aggregated_kpis.columns)['green']
+        green_rankings = add_rank_columns(aggregated_kpis, green_cols)
         
         # Save rankings
-        output_path = Path("spatialviz/outputs/rankings/green_rankings.csv")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        green_rankings.to_csv(output_path, index=False)
+        save_rankings(green_rankings, "green_rankings")
         
         logger.info("Green area rankings created")
         
@@ -351,9 +469,7 @@ def create_overall_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any
             overall_rankings = aggregated_kpis[overall_cols].copy()
             
             # Save overall rankings
-            output_path = Path("spatialviz/outputs/rankings/overall_rankings.csv")
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            overall_rankings.to_csv(output_path, index=False)
+            save_rankings(overall_rankings, "overall_rankings")
             
             logger.info("Overall rankings created")
         else:
@@ -364,15 +480,24 @@ def create_overall_rankings(aggregated_kpis: pd.DataFrame, config: Dict[str, Any
 
 # Helper functions for interactive dashboard
 
-def create_interactive_map(districts: gpd.GeoDataFrame, aggregated_kpis: pd.DataFrame, config: Dict[str, Any]) -> folium.Map:
+def create_interactive_map(districts: gpd.GeoDataFrame, aggregated_kpis: pd.DataFrame, config: Dict[str, Any]) -> "folium.Map":
     """Create interactive Folium map"""
+    import folium
+    from folium import plugins
+    
     try:
         # Merge districts with KPIs
-        districts_with_kpis = districts.merge(aggregated_kpis, on='district_id', how='left')
+        districts_with_kpis = merge_district_kpis(districts, aggregated_kpis)
+        
+        # District centroids in one vectorized pass, computed in a metric CRS (planar centroids
+        # on degrees are skewed) and transformed back to lon/lat; reused for center and labels
+        cents = districts_with_kpis.geometry.to_crs(METRIC_CRS).centroid.to_crs(4326).to_numpy()
+        xs = shapely.get_x(cents)
+        ys = shapely.get_y(cents)
         
         # Calculate center of Stuttgart
-        center_lat = districts_with_kpis.geometry.centroid.y.mean()
-        center_lon = districts_with_kpis.geometry.centroid.x.mean()
+        center_lat = np.nanmean(ys)
+        center_lon = np.nanmean(xs)
         
         # Create base map
         m = folium.Map(
@@ -381,9 +506,9 @@ def create_interactive_map(districts: gpd.GeoDataFrame, aggregated_kpis: pd.Data
             tiles='OpenStreetMap'
         )
         
-        # Add district polygons
+        # Add district polygons; the GeoJSON only needs the join key, values come via data=
         folium.Choropleth(
-            geo_data=districts_with_kpis.__geo_interface__,
+            geo_data=districts_with_kpis[['district_id', 'geometry']].to_json(),
             data=districts_with_kpis,
             columns=['district_id', 'weighted_total_score'],
             key_on='feature.properties.district_id',
@@ -394,13 +519,16 @@ def create_interactive_map(districts: gpd.GeoDataFrame, aggregated_kpis: pd.Data
         ).add_to(m)
         
         # Add district labels
-        for idx, row in districts_with_kpis.iterrows():
-            centroid = row.geometry.centroid
+        # Labels go into one clustered layer instead of N top-level markers
+        cluster = plugins.MarkerCluster(name='District labels').add_to(m)
+        ids = districts_with_kpis['district_id'].to_numpy()
+        scores = districts_with_kpis.get('weighted_total_score', pd.Series(np.nan, index=districts_with_kpis.index)).to_numpy()
+        for district_id, score, x, y in zip(ids, scores, xs, ys):
             folium.Marker(
-                [centroid.y, centroid.x],
-                popup=f"<b>{row['district_id']}</b><br>Score: {row.get('weighted_total_score', 'N/A'):.1f}",
+                [y, x],
+                popup=f"<b>{district_id}</b><br>Score: {score:.1f}",
                 icon=folium.Icon(color='red', icon='info-sign')
-            ).add_to(m)
+            ).add_to(cluster)
         
         return m
         
@@ -408,15 +536,7 @@ def create_interactive_map(districts: gpd.GeoDataFrame, aggregated_kpis: pd.Data
         logger.error(f"Error creating interactive map: {e}")
         return None
 
-def create_dashboard_html(dashboard_map: folium.Map, aggregated_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
-    """Create dashboard HTML file"""
-    try:
-        if dashboard_map is None:
-            logger.error("Dashboard map not available")
-            return
-        
-        # Create dashboard HTML
-        dashboard_html = f"""
+DASHBOARD_HTML_HEAD = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -424,16 +544,16 @@ def create_dashboard_html(dashboard_map: folium.Map, aggregated_kpis: pd.DataFra
             <meta charset="utf-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                .header {{ text-align: center; margin-bottom: 30px; }}
-                .dashboard-container {{ display: flex; gap: 20px; }}
-                .map-container {{ flex: 2; }}
-                .rankings-container {{ flex: 1; }}
-                .ranking-table {{ width: 100%; border-collapse: collapse; }}
-                .ranking-table th, .ranking-table td {{ 
+                body { font-family: Arial, sans-serif; margin: 20px; }
+                .header { text-align: center; margin-bottom: 30px; }
+                .dashboard-container { display: flex; gap: 20px; }
+                .map-container { flex: 2; }
+                .rankings-container { flex: 1; }
+                .ranking-table { width: 100%; border-collapse: collapse; }
+                .ranking-table th, .ranking-table td { 
                     border: 1px solid #ddd; padding: 8px; text-align: left; 
-                }}
-                .ranking-table th {{ background-color: #f2f2f2; }}
+                }
+                .ranking-table th { background-color: #f2f2f2; }
             </style>
         </head>
         <body>
@@ -445,31 +565,62 @@ def create_dashboard_html(dashboard_map: folium.Map, aggregated_kpis: pd.DataFra
             <div class="dashboard-container">
                 <div class="map-container">
                     <h2>Interactive Map</h2>
-                    {dashboard_map._repr_html_()}
+"""
+
+DASHBOARD_HTML_MIDDLE = """
                 </div>
                 
                 <div class="rankings-container">
                     <h2>District Rankings</h2>
                     <h3>Top 10 Districts</h3>
-                    {create_rankings_html(aggregated_kpis.head(10))}
+"""
+
+DASHBOARD_HTML_TAIL = """
                 </div>
             </div>
         </body>
         </html>
-        """
+"""
+
+def create_dashboard_html(dashboard_map: "folium.Map", aggregated_kpis: pd.DataFrame, config: Dict[str, Any]) -> None:
+    """Create dashboard HTML file"""
+    try:
+        if dashboard_map is None:
+            logger.error("Dashboard map not available")
+            return
         
-        # Save dashboard
+        # Top 10 by overall score (head(10) alone would follow file order)
+        if 'weighted_total_score' in aggregated_kpis.columns:
+            top_districts = top_k_rows(aggregated_kpis, 'weighted_total_score', 10)
+        else:
+            top_districts = aggregated_kpis.head(10)
+        
+        # Save dashboard, streaming the static template parts around the map and rankings
         output_path = Path("spatialviz/outputs/dashboard/stuttgart_dashboard.html")
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(dashboard_html)
+            f.write(DASHBOARD_HTML_HEAD)
+            f.write(dashboard_map._repr_html_())
+            f.write(DASHBOARD_HTML_MIDDLE)
+            f.write(create_rankings_html(top_districts))
+            f.write(DASHBOARD_HTML_TAIL)
         
         logger.info("Dashboard HTML created")
         
     except Exception as e:
         logger.error(f"Error creating dashboard HTML: {e}")
 
+def top_k_rows(df: pd.DataFrame, score_col: str, k: int) -> pd.DataFrame:
+    """Rows with the k highest non-null scores, best first (argpartition instead of a full sort)"""
+    scores = df[score_col].to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(scores))
+    k = min(k, valid.size)
+    if k == 0:
+        return df.iloc[:0]
+    top = valid[np.argpartition(-scores[valid], k - 1)[:k]]
+    return df.iloc[top[np.argsort(-scores[top], kind='stable')]]
+
 def create_rankings_html(rankings_df: pd.DataFrame) -> str:
     """Create HTML table for rankings"""
     try:
@@ -483,24 +634,13 @@ def create_rankings_html(rankings_df: pd.DataFrame) -> str:
         if not display_cols:
             return "<p>No ranking data available</p>"
         
-        # Create HTML table
-        html_table = "<table class='ranking-table'>"
-        html_table += "<tr>"
-        for col in display_cols:
-            html_table += f"<th>{col.replace('_', ' ').title()}</th>"
-        html_table += "</tr>"
-        
-        for _, row in rankings_df.iterrows():
-            html_table += "<tr>"
-            for col in display_cols:
-                value = row[col]
-                if isinstance(value, float):
-                    value = f"{value:.2f}"
-                html_table += f"<td>{value}</td>"
-            html_table += "</tr>"
-        
-        html_table += "</table>"
-        return html_table
+        # Create HTML table in one formatter pass
+        return rankings_df[display_cols].rename(columns=lambda col: col.replace('_', ' ').title()).to_html(
+            index=False,
+            classes='ranking-table',
+            float_format=lambda value: f"{value:.2f}",
+            border=0,
+        )
         
     except Exception as e:
         logger.error(f"Error creating rankings HTML: {e}")
@@ -513,71 +653,58 @@ def generate_report_content(aggregated_kpis: pd.DataFrame, transport_kpis: pd.Da
                            config: Dict[str, Any]) -> str:
     """Generate report content"""
     try:
-        report_content = f"""
-# Stuttgart Mobility & Walkability Analysis Report
-
-## Executive Summary
-
-This report presents a comprehensive analysis of mobility and walkability indicators across Stuttgart's districts, based on data collected from multiple sources including GTFS VVS, OpenStreetMap, and official district boundaries.
-
-## Analysis Overview
-
-- **Total Districts Analyzed**: {len(aggregated_kpis) if not aggregated_kpis.empty else 'N/A'}
-- **Data Sources**: GTFS VVS, OpenStreetMap, Official District Boundaries
-- **Analysis Date**: {pd.Timestamp.now().strftime('%Y-%m-%d')}
-
-## Key Findings
-
-### Top Performing Districts
-
-{generate_top_districts_section(aggregated_kpis)}
-
-### Transport Accessibility
-
-{generate_transport_summary(transport_kpis)}
-
-### Walkability Analysis
-
-{generate_walkability_summary(walkability_kpis)}
-
-### Green Area Accessibility
-
-{generate_green_summary(green_kpis)}
-
-## Methodology
-
-The analysis follows a three-stage pipeline:
-1. **Data Collection**: GTFS VVS data, OSM data, and district boundaries
-2. **KPI Calculation**: Transport, walkability, and green area indicators
-3. **Visualization**: Maps, rankings, and interactive dashboard
-
-## Data Quality Notes
-
-- All data sources are validated for completeness and accuracy
-- Missing data is handled gracefully with appropriate fallbacks
-- Results are normalized for fair comparison across districts
-
-## Recommendations
-
-Based on the analysis, the following recommendations are made:
-
-1. **Transport**: Focus on improving frequency and coverage in lower-performing districts
-2. **Walkability**: Enhance pedestrian infrastructure in areas with low intersection density
-3. **Green Areas**: Increase green space accessibility in urban core districts
-
-## Technical Details
-
-- **Analysis Framework**: Python-based modular pipeline
-- **Data Formats**: Parquet, GeoJSON, CSV
-- **Visualization**: Matplotlib, Folium, Seaborn
-- **Configuration**: YAML-based configuration management
-
----
-
-*Report generated automatically by Stuttgart Mobility & Walkability Analysis Pipeline*
-        """
-        
-        return report_content
+        # Sections are collected in a list and joined once
+        sections = [
+            "# Stuttgart Mobility & Walkability Analysis Report",
+            "## Executive Summary",
+            "This report presents a comprehensive analysis of mobility and walkability indicators across Stuttgart's districts, based on data collected from multiple sources including GTFS VVS, OpenStreetMap, and official district boundaries.",
+            "## Analysis Overview",
+            "\n".join([
+                f"- **Total Districts Analyzed**: {len(aggregated_kpis) if not aggregated_kpis.empty else 'N/A'}",
+                "- **Data Sources**: GTFS VVS, OpenStreetMap, Official District Boundaries",
+                f"- **Analysis Date**: {date.today().isoformat()}",
+            ]),
+            "## Key Findings",
+            "### Top Performing Districts",
+            generate_top_districts_section(aggregated_kpis),
+            "### Transport Accessibility",
+            generate_transport_summary(transport_kpis),
+            "### Walkability Analysis",
+            generate_walkability_summary(walkability_kpis),
+            "### Green Area Accessibility",
+            generate_green_summary(green_kpis),
+            "## Methodology",
+            "\n".join([
+                "The analysis follows a three-stage pipeline:",
+                "1. **Data Collection**: GTFS VVS data, OSM data, and district boundaries",
+                "2. **KPI Calculation**: Transport, walkability, and green area indicators",
+                "3. **Visualization**: Maps, rankings, and interactive dashboard",
+            ]),
+            "## Data Quality Notes",
+            "\n".join([
+                "- All data sources are validated for completeness and accuracy",
+                "- Missing data is handled gracefully with appropriate fallbacks",
+                "- Results are normalized for fair comparison across districts",
+            ]),
+            "## Recommendations",
+            "Based on the analysis, the following recommendations are made:",
+            "\n".join([
+                "1. **Transport**: Focus on improving frequency and coverage in lower-performing districts",
+                "2. **Walkability**: Enhance pedestrian infrastructure in areas with low intersection density",
+                "3. **Green Areas**: Increase green space accessibility in urban core districts",
+            ]),
+            "## Technical Details",
+            "\n".join([
+                "- **Analysis Framework**: Python-based modular pipeline",
+                "- **Data Formats**: Parquet, GeoJSON, CSV",
+                "- **Visualization**: Matplotlib, Folium",
+                "- **Configuration**: YAML-based configuration management",
+            ]),
+            "---",
+            "*Report generated automatically by Stuttgart Mobility & Walkability Analysis Pipeline*",
+        ]
+        
+        return "\n\n".join(sections) + "\n"
         
     except Exception as e:
         logger.error(f"Error generating report content: {e}")
@@ -590,15 +717,15 @@ def generate_top_districts_section(aggregated_kpis: pd.DataFrame) -> str:
             return "No ranking data available."
         
         if 'weighted_total_score' in aggregated_kpis.columns:
-            top_districts = aggregated_kpis.nlargest(5, 'weighted_total_score')
+            top_districts = top_k_rows(aggregated_kpis, 'weighted_total_score', 5)
+            ids = top_districts.get('district_id', pd.Series('Unknown', index=top_districts.index)).to_numpy()
+            scores = top_districts['weighted_total_score'].to_numpy()
             
-            section = "The top 5 performing districts based on overall weighted scores:\n\n"
-            for idx, (_, district) in enumerate(top_districts.iterrows(), 1):
-                score = district.get('weighted_total_score', 'N/A')
-                district_id = district.get('district_id', 'Unknown')
-                section += f"{idx}. **{district_id}**: {score:.2f}\n"
+            parts = ["The top 5 performing districts based on overall weighted scores:", ""]
+            for idx, (district_id, score) in enumerate(zip(ids, scores), 1):
+                parts.append(f"{idx}. **{district_id}**: {score:.2f}")
             
-            return section
+            return "\n".join(parts)
         else:
             return "Overall scores not available for ranking."
         
@@ -606,24 +733,29 @@ def generate_top_districts_section(aggregated_kpis: pd.DataFrame) -> str:
         logger.error(f"Error generating top districts section: {e}")
         return "Error generating top districts section."
 
+def summarize_means(kpis: pd.DataFrame, metrics: List[tuple]) -> List[str]:
+    """Format (column, template) summary lines from one mean() over the present columns"""
+    present = [(col, template) for col, template in metrics if col in kpis.columns]
+    if not present:
+        return []
+    means = kpis[[col for col, _ in present]].mean()
+    return [template.format(means[col]) for col, template in present]
+
 def generate_transport_summary(transport_kpis: pd.DataFrame) -> str:
     """Generate transport summary for report"""
     try:
         if transport_kpis.empty:
             return "No transport data available."
         
-        summary = f"Transport analysis covers {len(transport_kpis)} districts.\n\n"
+        parts = [f"Transport analysis covers {len(transport_kpis)} districts.", ""]
         
         # Add key metrics if available
-        if 'pt_stops_count' in transport_kpis.columns:
-            avg_stops = transport_kpis['pt_stops_count'].mean()
-            summary += f"- Average PT stops per district: {avg_stops:.1f}\n"
-        
-        if 'population_300m_pt' in transport_kpis.columns:
-            avg_pop_300m = transport_kpis['population_300m_pt'].mean()
-            summary += f"- Average population within 300m of PT: {avg_pop_300m:.1f}%\n"
+        parts += summarize_means(transport_kpis, [
+            ('pt_stops_count', "- Average PT stops per district: {:.1f}"),
+            ('population_300m_pt', "- Average population within 300m of PT: {:.1f}%"),
+        ])
         
-        return summary
+        return "\n".join(parts)
         
     except Exception as e:
         logger.error(f"Error generating transport summary: {e}")
@@ -635,18 +767,15 @@ def generate_walkability_summary(walkability_kpis: pd.DataFrame) -> str:
         if walkability_kpis.empty:
             return "No walkability data available."
         
-        summary = f"Walkability analysis covers {len(walkability_kpis)} districts.\n\n"
+        parts = [f"Walkability analysis covers {len(walkability_kpis)} districts.", ""]
         
         # Add key metrics if available
-        if 'intersection_density' in walkability_kpis.columns:
-            avg_intersections = walkability_kpis['intersection_density'].mean()
-            summary += f"- Average intersection density: {avg_intersections:.2f} per km²\n"
+        parts += summarize_means(walkability_kpis, [
+            ('intersection_density', "- Average intersection density: {:.2f} per km²"),
+            ('walkability_score', "- Average walkability score: {:.2f}"),
+        ])
         
-        if 'walkability_score' in walkability_kpis.columns:
-            avg_score = walkability_kpis['walkability_score'].mean()
-            summary += f"- Average walkability score: {avg_score:.2f}\n"
-        
-        return summary
+        return "\n".join(parts)
         
     except Exception as e:
         logger.error(f"Error generating walkability summary: {e}")
@@ -658,18 +787,15 @@ def generate_green_summary(green_kpis: pd.DataFrame) -> str:
         if green_kpis.empty:
             return "No green area data available."
         
-        summary = f"Green area analysis covers {len(green_kpis)} districts.\n\n"
+        parts = [f"Green area analysis covers {len(green_kpis)} districts.", ""]
         
         # Add key metrics if available
-        if 'greenspace_area_ha' in green_kpis.columns:
-            avg_area = green_kpis['greenspace_area_ha'].mean()
-            summary += f"- Average green space area: {avg_area:.2f} hectares\n"
-        
-        if 'green_accessibility_score' in green_kpis.columns:
-            avg_score = green_kpis['green_accessibility_score'].mean()
-            summary += f"- Average green accessibility score: {avg_score:.2f}\n"
+        parts += summarize_means(green_kpis, [
+            ('greenspace_area_ha', "- Average green space area: {:.2f} hectares"),
+            ('green_accessibility_score', "- Average green accessibility score: {:.2f}"),
+        ])
         
-        return summary
+        return "\n".join(parts)
         
     except Exception as e:
         logger.error(f"Error generating green summary: {e}")
@@ -3,10 +3,30 @@ Spatial Analysis Core Module
 
 This module provides shared functionality for the ETL Geodata Pipeline system,
 including database management and data loading capabilities.
+
+Exports are imported on first access (PEP 562), so `import spatial_analysis_core`
+stays cheap and the database dependencies are only loaded when used.
 """
 
-from .database.database_manager import DatabaseManager
-from .database.postgis_manager import PostGISManager
-from .data_loader import DataLoader, extract_city_osm_data
+import importlib
+
+_LAZY = {
+    'DatabaseManager': '.database.database_manager',
+    'PostGISManager': '.database.postgis_manager',
+    'DataLoader': '.data_loader',
+    'extract_city_osm_data': '.data_loader',
+}
 
 __all__ = ['DatabaseManager', 'PostGISManager', 'DataLoader', 'extract_city_osm_data']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        obj = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = obj
+        return obj
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
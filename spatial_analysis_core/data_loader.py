@@ -6,32 +6,85 @@ This module provides city-agnostic data loading functionality for the ETL Geodat
 including OSM data extraction via QuackOSM and support for various data formats.
 """
 
+from __future__ import annotations
+
+import hashlib
+import json
 import os
+import shutil
+import subprocess
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Union, Tuple
 import logging
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from importlib.util import find_spec
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+    import pandas as pd
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore", category=UserWarning)
 
-try:
-    import quackosm
-    from quackosm import PbfFileReader, OsmPbfReader
-    QUACKOSM_AVAILABLE = True
-except ImportError:
-    QUACKOSM_AVAILABLE = False
+# Heavy dependencies (GDAL, PROJ, DuckDB) are only imported on first use, so
+# importing this module and spawning workers stays cheap
+QUACKOSM_AVAILABLE = find_spec("quackosm") is not None
+if not QUACKOSM_AVAILABLE:
     print("⚠️ QuackOSM not available. Install with: pip install quackosm")
 
-try:
-    import geopandas as gpd
-    import pandas as pd
-    GEOPANDAS_AVAILABLE = True
-except ImportError:
-    GEOPANDAS_AVAILABLE = False
+GEOPANDAS_AVAILABLE = find_spec("geopandas") is not None and find_spec("pandas") is not None
+if not GEOPANDAS_AVAILABLE:
     print("⚠️ GeoPandas not available. Install with: pip install geopandas")
 
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+PYOGRIO_AVAILABLE = find_spec("pyogrio") is not None
+H3_AVAILABLE = find_spec("h3") is not None
+
+# OGR writes go through pyogrio (streaming Arrow batches when possible)
+IO_ENGINE = "pyogrio" if PYOGRIO_AVAILABLE else "fiona"
+IO_WRITE_KWARGS = {"use_arrow": True} if PYOGRIO_AVAILABLE and PYARROW_AVAILABLE else {}
+
+# Above this many features GeoJSON output is noticeably slow and bulky
+GEOJSON_WARN_FEATURES = 100_000
+
+
+@lru_cache(maxsize=1)
+def _gpd():
+    """Import geopandas on first use"""
+    import geopandas
+    return geopandas
+
+
+@lru_cache(maxsize=1)
+def _pd():
+    """Import pandas on first use"""
+    import pandas
+    return pandas
+
+
+@lru_cache(maxsize=1)
+def _pq():
+    """Import pyarrow.parquet on first use"""
+    import pyarrow.parquet
+    return pyarrow.parquet
+
+
+@lru_cache(maxsize=1)
+def _h3_int():
+    """Import the integer-cell h3 API on first use"""
+    from h3.api import basic_int
+    return basic_int
+
+
+@lru_cache(maxsize=1)
+def _quackosm():
+    """Import quackosm on first use"""
+    import quackosm
+    return quackosm
+
 logger = logging.getLogger(__name__)
 
 class DataLoader:
@@ -42,21 +95,77 @@ class DataLoader:
     supporting various output formats and data types.
     """
     
-    def __init__(self, output_dir: Optional[Union[str, Path]] = None):
+    def __init__(
+        self,
+        output_dir: Optional[Union[str, Path]] = None,
+        use_cache: bool = True,
+        h3_resolution: Optional[int] = 9
+    ):
         """
         Initialize the DataLoader.
         
         Args:
             output_dir: Directory to save extracted data. If None, uses current directory.
+            use_cache: Cache non-parquet sources as GeoParquet under output_dir/cache
+            h3_resolution: Resolution of the H3 cell id column (``h3_<res>``)
+                added to extracted OSM layers. None disables it.
         """
         self.output_dir = Path(output_dir) if output_dir else Path.cwd()
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.use_cache = use_cache
+        self.h3_resolution = h3_resolution if H3_AVAILABLE else None
+        self.cache_dir = self.output_dir / "cache"
+        self._readers: Dict[Path, object] = {}
         
         if not QUACKOSM_AVAILABLE:
             logger.warning("QuackOSM not available. OSM extraction will not work.")
         if not GEOPANDAS_AVAILABLE:
             logger.warning("GeoPandas not available. Some data processing may not work.")
     
+    def _get_reader(self, pbf_file: Union[str, Path]):
+        """
+        Get the QuackOSM reader for a PBF, creating it on first use.
+        
+        Args:
+            pbf_file: Path to OSM PBF file
+            
+        Returns:
+            PbfFileReader shared by all extractions from this file
+        """
+        key = Path(pbf_file).resolve()
+        if key not in self._readers:
+            self._prefetch(key)
+            self._readers[key] = _quackosm().PbfFileReader(pbf_file)
+        return self._readers[key]
+    
+    @staticmethod
+    def _prefetch(file_path: Path) -> None:
+        """
+        Ask the kernel to start reading a file into the page cache.
+        
+        Access-pattern hints such as POSIX_FADV_SEQUENTIAL only apply to the
+        descriptor they are set on, and QuackOSM opens its own, so WILLNEED
+        (which populates the shared page cache asynchronously) is used instead.
+        No-op where posix_fadvise is unavailable (macOS, Windows).
+        
+        Args:
+            file_path: File that is about to be read
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.debug("posix_fadvise failed for %s: %s", file_path, e)
+    
+    def close(self) -> None:
+        """Release the cached QuackOSM readers."""
+        self._readers.clear()
+    
     def extract_osm_data(
         self,
         pbf_file: Union[str, Path],
@@ -64,8 +173,11 @@ class DataLoader:
         output_name: str,
         tags_filter: Optional[Dict] = None,
         output_format: str = "parquet",
-        crs: str = "EPSG:4326"
-    ) -> Optional[gpd.GeoDataFrame]:
+        crs: str = "EPSG:4326",
+        columns_keep: Optional[List[str]] = None,
+        force: bool = False,
+        stream_to_parquet: bool = False
+    ) -> Optional[Union[gpd.GeoDataFrame, Path]]:
         """
         Extract OSM data using QuackOSM for the specified bounding box.
         
@@ -76,29 +188,54 @@ class DataLoader:
             tags_filter: Dictionary of OSM tags to filter by
             output_format: Output format ('parquet', 'geojson', 'gpkg')
             crs: Coordinate reference system for output
+            columns_keep: Attribute columns to keep besides geometry. Defaults
+                to the keys of tags_filter; all columns are kept without a filter.
+            force: Re-extract even if a parquet output for the same PBF version,
+                bbox and filter already exists
+            stream_to_parquet: Let QuackOSM write the parquet file directly
+                (parquet output only) and return its path instead of a
+                GeoDataFrame, so the layer is never held in memory. The file is
+                written as QuackOSM produces it: EPSG:4326, all tag columns,
+                no H3 column or Hilbert ordering. Load it later with load_data.
             
         Returns:
-            GeoDataFrame with extracted data, or None if extraction failed
+            GeoDataFrame with extracted data (or the parquet path when
+            streaming), or None if extraction failed
         """
         if not QUACKOSM_AVAILABLE:
             logger.error("QuackOSM not available. Cannot extract OSM data.")
             return None
         
         try:
-            logger.info(f"🚀 Extracting OSM data for {output_name}")
-            logger.info(f"📁 PBF file: {pbf_file}")
-            logger.info(f"📍 Bounding box: {bbox}")
+            logger.info("🚀 Extracting OSM data for %s", output_name)
+            logger.info("📁 PBF file: %s", pbf_file)
+            logger.info("📍 Bounding box: %s", bbox)
             
             # Create output directory
             output_path = self.output_dir / output_name
             output_path.mkdir(parents=True, exist_ok=True)
             
+            # Reuse a previous extraction of the same inputs
+            cache_file = None
+            if output_format == "parquet":
+                params = {"tags": tags_filter, "columns": columns_keep, "h3": self.h3_resolution}
+                if stream_to_parquet:
+                    params = {"tags": tags_filter, "streamed": True}
+                cache_file = self._extraction_cache_path(pbf_file, bbox, params, output_path, output_name)
+                if cache_file.exists() and not force:
+                    logger.info("📦 Reusing extraction: %s", cache_file)
+                    return cache_file if stream_to_parquet else self.load_data(cache_file)
+                if stream_to_parquet:
+                    return self._stream_extraction(pbf_file, bbox, tags_filter, output_path, output_name, cache_file)
+            elif stream_to_parquet:
+                logger.warning("⚠️ stream_to_parquet needs output_format='parquet'; extracting in memory")
+            
             # Initialize QuackOSM reader
-            reader = PbfFileReader(pbf_file)
+            reader = self._get_reader(pbf_file)
             
             # Extract data with bounding box filter
             if tags_filter:
-                logger.info(f"🔍 Applying tags filter: {tags_filter}")
+                logger.info("🔍 Applying tags filter: %s", tags_filter)
                 gdf = reader.get_features_gdf(
                     tags_filter=tags_filter,
                     bbox=bbox
@@ -108,21 +245,27 @@ class DataLoader:
                 gdf = reader.get_features_gdf(bbox=bbox)
             
             if gdf.empty:
-                logger.warning(f"⚠️ No data found for {output_name} in the specified area")
+                logger.warning("⚠️ No data found for %s in the specified area", output_name)
                 return None
             
-            logger.info(f"✅ Extracted {len(gdf)} features for {output_name}")
+            logger.info("✅ Extracted %s features for %s", len(gdf), output_name)
             
             # Set CRS
-            gdf = gdf.set_crs(crs)
+            self._ensure_crs(gdf, crs)
+            
+            if columns_keep is None and tags_filter:
+                columns_keep = list(tags_filter)
+            if columns_keep is not None:
+                gdf = self._prune_columns(gdf, columns_keep)
+            self._add_h3_column(gdf)
             
             # Save data
-            self._save_data(gdf, output_path, output_name, output_format)
+            self._store_extraction(gdf, output_path, output_name, output_format, cache_file)
             
             return gdf
             
         except Exception as e:
-            logger.error(f"❌ Failed to extract OSM data for {output_name}: {e}")
+            logger.error("❌ Failed to extract OSM data for %s: %s", output_name, e)
             return None
     
     def extract_osm_layers(
@@ -132,7 +275,8 @@ class DataLoader:
         output_name: str,
         layers: Optional[List[str]] = None,
         output_format: str = "parquet",
-        crs: str = "EPSG:4326"
+        crs: str = "EPSG:4326",
+        force: bool = False
     ) -> Dict[str, gpd.GeoDataFrame]:
         """
         Extract multiple OSM layers at once.
@@ -144,6 +288,7 @@ class DataLoader:
             layers: List of layer names to extract. If None, extracts common layers
             output_format: Output format for all layers
             crs: Coordinate reference system for output
+            force: Re-extract layers even if their parquet output is up to date
             
         Returns:
             Dictionary mapping layer names to GeoDataFrames
@@ -160,32 +305,364 @@ class DataLoader:
         
         results = {}
         
-        for layer in layers:
-            logger.info(f"🔄 Extracting layer: {layer}")
+        # Reuse layers already extracted from the same PBF version, bbox and tags
+        cache_files = {}
+        if output_format == "parquet":
+            for layer in layers:
+                tags = self._get_layer_tags(layer)
+                if not tags:
+                    continue
+                layer_name = f"{output_name}_{layer}"
+                cache_files[layer] = self._extraction_cache_path(
+                    pbf_file, bbox, {"tags": tags, "h3": self.h3_resolution},
+                    self.output_dir / layer_name, layer_name
+                )
+                if cache_files[layer].exists() and not force:
+                    gdf = self.load_data(cache_files[layer])
+                    if gdf is not None:
+                        logger.info("📦 %s: reusing %s", layer, cache_files[layer])
+                        results[layer] = gdf
+        
+        missing = [layer for layer in layers if layer not in results]
+        if not missing:
+            return results
+        
+        # Shrink the PBF once to the bbox and the union of all layer tags,
+        # so the QuackOSM scan reads a small file
+        all_tags = [self._get_layer_tags(layer) or {} for layer in missing]
+        pbf_file = self._prefilter_pbf(pbf_file, bbox, all_tags)
+        
+        extracted = {}
+        for layer, gdf in self._extract_union(pbf_file, bbox, missing).items():
+            if gdf.empty:
+                logger.warning("⚠️ %s: No data extracted", layer)
+                continue
+            self._ensure_crs(gdf, crs)
+            self._add_h3_column(gdf)
+            extracted[layer] = gdf
+            logger.info("✅ %s: %s features", layer, len(gdf))
+        
+        def save_layer(item):
+            layer, gdf = item
+            layer_name = f"{output_name}_{layer}"
+            output_path = self.output_dir / layer_name
+            output_path.mkdir(parents=True, exist_ok=True)
+            self._store_extraction(gdf, output_path, layer_name, output_format, cache_files.get(layer))
+        
+        # Layers are independent and writes release the GIL, so save them concurrently
+        if extracted:
+            with ThreadPoolExecutor(max_workers=min(len(extracted), os.cpu_count() or 1)) as executor:
+                list(executor.map(save_layer, extracted.items()))
+        
+        results.update(extracted)
+        return results
+    
+    @staticmethod
+    def _extraction_cache_path(
+        pbf_file: Union[str, Path],
+        bbox: Tuple[float, float, float, float],
+        params: Dict,
+        output_path: Path,
+        output_name: str
+    ) -> Path:
+        """
+        Build the parquet path of an extraction, keyed by its inputs.
+        
+        Args:
+            pbf_file: Path to OSM PBF file
+            bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
+            params: Extraction parameters (tags filter, kept columns)
+            output_path: Output directory of the extraction
+            output_name: Name for the output file
             
-            # Define tags filter for each layer
-            tags_filter = self._get_layer_tags(layer)
+        Returns:
+            Path of the form <output_path>/<output_name>.<key>.parquet
+        """
+        key = hashlib.blake2b(
+            f"{Path(pbf_file).stat().st_mtime_ns}|{bbox}|{json.dumps(params, sort_keys=True)}".encode()
+        ).hexdigest()[:16]
+        return output_path / f"{output_name}.{key}.parquet"
+    
+    def _store_extraction(
+        self,
+        gdf: gpd.GeoDataFrame,
+        output_path: Path,
+        output_name: str,
+        output_format: str,
+        cache_file: Optional[Path]
+    ) -> None:
+        """
+        Save an extraction, under its cache key when one is given.
+        
+        Older keyed outputs of the same name are removed so only the current
+        extraction stays in the directory.
+        
+        Args:
+            gdf: GeoDataFrame to save
+            output_path: Output directory path
+            output_name: Name for the output file
+            output_format: Output format
+            cache_file: Keyed parquet path from _extraction_cache_path, if any
+        """
+        if cache_file is None:
+            self._save_data(gdf, output_path, output_name, output_format)
+            return
+        
+        self._drop_stale_extractions(output_path, output_name, cache_file)
+        self._save_data(gdf, output_path, cache_file.stem, output_format)
+    
+    def _stream_extraction(
+        self,
+        pbf_file: Union[str, Path],
+        bbox: Tuple[float, float, float, float],
+        tags_filter: Optional[Dict],
+        output_path: Path,
+        output_name: str,
+        cache_file: Path
+    ) -> Path:
+        """
+        Extract straight to GeoParquet with QuackOSM, without a GeoDataFrame.
+        
+        Args:
+            pbf_file: Path to OSM PBF file
+            bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
+            tags_filter: Dictionary of OSM tags to filter by
+            output_path: Output directory path
+            output_name: Name for the output file
+            cache_file: Keyed parquet path to write
             
-            if tags_filter:
-                gdf = self.extract_osm_data(
-                    pbf_file=pbf_file,
-                    bbox=bbox,
-                    output_name=f"{output_name}_{layer}",
-                    tags_filter=tags_filter,
-                    output_format=output_format,
-                    crs=crs
-                )
-                
-                if gdf is not None:
-                    results[layer] = gdf
-                    logger.info(f"✅ {layer}: {len(gdf)} features")
-                else:
-                    logger.warning(f"⚠️ {layer}: No data extracted")
+        Returns:
+            Path to the written parquet file
+        """
+        from shapely.geometry import box
+        
+        self._drop_stale_extractions(output_path, output_name, cache_file)
+        result = _quackosm().convert_pbf_to_parquet(
+            pbf_file,
+            tags_filter=tags_filter,
+            geometry_filter=box(*bbox),
+            result_file_path=cache_file,
+            explode_tags=True
+        )
+        logger.info("💾 Saved: %s", result)
+        return Path(result)
+    
+    @staticmethod
+    def _drop_stale_extractions(output_path: Path, output_name: str, cache_file: Path) -> None:
+        """Remove older keyed and legacy unkeyed outputs of output_name, keeping cache_file."""
+        (output_path / f"{output_name}.parquet").unlink(missing_ok=True)
+        for stale in output_path.glob(f"{output_name}.*.parquet"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+    
+    def _extract_union(
+        self,
+        pbf_file: Union[str, Path],
+        bbox: Tuple[float, float, float, float],
+        layers: List[str]
+    ) -> Dict[str, gpd.GeoDataFrame]:
+        """
+        Extract several layers with a single QuackOSM pass.
+        
+        The PBF is read once with the union of all layer tag filters, and the
+        result is split into layers with vectorized tag masks.
+        
+        Args:
+            pbf_file: Path to OSM PBF file
+            bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
+            layers: Layer names to extract
+            
+        Returns:
+            Dictionary mapping layer names to (unsaved) GeoDataFrames
+        """
+        if not QUACKOSM_AVAILABLE:
+            logger.error("QuackOSM not available. Cannot extract OSM data.")
+            return {}
+        
+        layer_tags = {}
+        for layer in layers:
+            tags = self._get_layer_tags(layer)
+            if tags:
+                layer_tags[layer] = tags
             else:
-                logger.warning(f"⚠️ {layer}: No tags filter defined")
+                logger.warning("⚠️ %s: No tags filter defined", layer)
+        if not layer_tags:
+            return {}
+        
+        merged = self._merge_tags(layer_tags.values())
+        tags_filter = {
+            key: ["*"] if "*" in values else sorted(values) for key, values in merged.items()
+        }
+        
+        try:
+            logger.info("🚀 Extracting %s layers in one pass from %s", len(layer_tags), pbf_file)
+            reader = self._get_reader(pbf_file)
+            gdf = reader.get_features_gdf(tags_filter=tags_filter, bbox=bbox)
+        except Exception as e:
+            logger.error("❌ Failed to extract OSM layers: %s", e)
+            return {}
+        
+        results = {}
+        for layer, tags in layer_tags.items():
+            mask = _pd().Series(False, index=gdf.index)
+            for key, values in tags.items():
+                if key not in gdf.columns:
+                    continue
+                mask |= gdf[key].notna() if "*" in values else gdf[key].isin(values)
+            results[layer] = self._prune_columns(gdf.loc[mask], list(tags))
         
         return results
     
+    @staticmethod
+    def _ensure_crs(gdf: gpd.GeoDataFrame, crs: str) -> None:
+        """
+        Tag or reproject a GeoDataFrame to crs in place.
+        
+        QuackOSM already emits EPSG:4326, so the common case is a no-op
+        instead of a copy of the geometry column.
+        
+        Args:
+            gdf: GeoDataFrame to update
+            crs: Target coordinate reference system
+        """
+        if gdf.crs is None:
+            gdf.set_crs(crs, inplace=True)
+        elif gdf.crs != crs:
+            gdf.to_crs(crs, inplace=True)
+    
+    def _add_h3_column(self, gdf: gpd.GeoDataFrame) -> None:
+        """
+        Add the H3 cell id of each feature's representative point in place.
+        
+        Stored as uint64 in an ``h3_<res>`` column, so downstream hex joins
+        and aggregations don't have to index coordinates again.
+        
+        Args:
+            gdf: GeoDataFrame to update
+        """
+        if self.h3_resolution is None or gdf.empty:
+            return
+        
+        h3_int = _h3_int()
+        points = gdf.geometry.representative_point()
+        if gdf.crs is not None and gdf.crs != "EPSG:4326":
+            points = points.to_crs("EPSG:4326")
+        res = self.h3_resolution
+        # Empty geometries give NaN coordinates; map them to H3_NULL (0)
+        cells = [
+            h3_int.latlng_to_cell(lat, lon, res) if lat == lat else 0
+            for lon, lat in zip(points.x.to_numpy(), points.y.to_numpy())
+        ]
+        gdf[f"h3_{res}"] = _pd().array(cells, dtype="uint64")
+    
+    @staticmethod
+    def _prune_columns(gdf: gpd.GeoDataFrame, columns_keep: List[str]) -> gpd.GeoDataFrame:
+        """
+        Keep only geometry and the given attribute (tag) columns, stored as
+        categoricals.
+        
+        Args:
+            gdf: GeoDataFrame to prune
+            columns_keep: Attribute columns to keep
+            
+        Returns:
+            Pruned copy of the GeoDataFrame
+        """
+        keep = [c for c in gdf.columns if c in columns_keep]
+        gdf = gdf[keep + [gdf.geometry.name]].copy()
+        for col in keep:
+            # Tag values repeat heavily, even for open-ended keys like shop;
+            # categoricals hold int codes and are written as parquet dictionaries.
+            # pandas 3 reads text as the str dtype rather than object
+            if _pd().api.types.is_object_dtype(gdf[col]) or _pd().api.types.is_string_dtype(gdf[col]):
+                gdf[col] = gdf[col].astype("category")
+        return gdf
+    
+    @staticmethod
+    def _merge_tags(all_tags) -> Dict[str, set]:
+        """
+        Union several tags filters into one key -> values mapping.
+        
+        A "*" value on any filter means the whole key matches.
+        
+        Args:
+            all_tags: Iterable of tags filters
+            
+        Returns:
+            Dictionary mapping each tag key to the set of its values
+        """
+        merged: Dict[str, set] = {}
+        for tags in all_tags:
+            for key, values in tags.items():
+                merged.setdefault(key, set()).update(values)
+        return merged
+    
+    def _prefilter_pbf(
+        self,
+        pbf_file: Union[str, Path],
+        bbox: Tuple[float, float, float, float],
+        all_tags: List[Dict]
+    ) -> Path:
+        """
+        Cut a PBF down to a bbox and a set of tags with osmium.
+        
+        The filtered file is cached in cache_dir, keyed by bbox, tags and the
+        source file's mtime. Falls back to the original PBF if the osmium
+        command line tool is not installed or fails.
+        
+        Args:
+            pbf_file: Path to OSM PBF file
+            bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
+            all_tags: Tags filters of all layers that will read the file
+            
+        Returns:
+            Path to the filtered PBF, or the original PBF
+        """
+        pbf_file = Path(pbf_file)
+        osmium = shutil.which("osmium")
+        if osmium is None:
+            logger.info("osmium not found - QuackOSM will scan the full PBF")
+            return pbf_file
+        
+        merged = self._merge_tags(all_tags)
+        if not merged:
+            return pbf_file
+        expressions = [
+            f"nwr/{key}" if "*" in values else f"nwr/{key}={','.join(sorted(values))}"
+            for key, values in sorted(merged.items())
+        ]
+        
+        key = hashlib.sha1(
+            f"{pbf_file.resolve()}:{pbf_file.stat().st_mtime_ns}:{bbox}:{expressions}".encode()
+        ).hexdigest()[:16]
+        filtered = self.cache_dir / f"{pbf_file.stem.split('.')[0]}_{key}.osm.pbf"
+        if filtered.exists():
+            logger.info("📦 Using pre-filtered PBF: %s", filtered)
+            return filtered
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        clipped = filtered.with_name(f"{key}_bbox.osm.pbf")
+        min_lon, min_lat, max_lon, max_lat = bbox
+        try:
+            logger.info("✂️ Pre-filtering %s with osmium", pbf_file)
+            subprocess.run(
+                [osmium, "extract", "-b", f"{min_lon},{min_lat},{max_lon},{max_lat}",
+                 "--strategy=smart", "--overwrite", "-o", str(clipped), str(pbf_file)],
+                check=True, capture_output=True
+            )
+            subprocess.run(
+                [osmium, "tags-filter", "--overwrite", "-o", str(filtered), str(clipped), *expressions],
+                check=True, capture_output=True
+            )
+        except subprocess.CalledProcessError as e:
+            logger.warning("⚠️ osmium pre-filter failed, using full PBF: %s", e.stderr.decode(errors='replace').strip())
+            filtered.unlink(missing_ok=True)
+            return pbf_file
+        finally:
+            clipped.unlink(missing_ok=True)
+        
+        return filtered
+    
     def _get_layer_tags(self, layer: str) -> Optional[Dict]:
         """
         Get OSM tags filter for a specific layer.
@@ -213,7 +690,15 @@ class DataLoader:
                 "leisure": ["park", "garden", "playground"]
             },
             "roads": {
-                "highway": ["*"]
+                # Explicit road classes; "*" would also pull in bus stops,
+                # street lamps, crossings and proposed/construction ways
+                "highway": [
+                    "motorway", "motorway_link", "trunk", "trunk_link",
+                    "primary", "primary_link", "secondary", "secondary_link",
+                    "tertiary", "tertiary_link", "unclassified", "residential",
+                    "living_street", "service", "pedestrian", "track",
+                    "footway", "path", "steps", "cycleway", "bridleway"
+                ]
             },
             "public_transport": {
                 "public_transport": ["*"],
@@ -247,36 +732,64 @@ class DataLoader:
         try:
             if output_format == "parquet":
                 file_path = output_path / f"{output_name}.parquet"
-                gdf.to_parquet(file_path)
-                logger.info(f"💾 Saved: {file_path}")
+                # Hilbert order keeps nearby features in the same row groups, so
+                # the bbox covering statistics let bbox reads skip most of the file.
+                # hilbert_distance rejects missing and empty geometries, and the
+                # sort is only an optimisation, so never let it abort the save
+                if len(gdf) > 1 and not (gdf.geometry.isna() | gdf.geometry.is_empty).any():
+                    try:
+                        gdf = gdf.iloc[gdf.geometry.hilbert_distance().to_numpy().argsort(kind="stable")]
+                    except Exception as e:
+                        logger.debug("Skipping Hilbert sort for %s: %s", output_name, e)
+                gdf.to_parquet(
+                    file_path,
+                    compression="zstd",
+                    row_group_size=100_000,
+                    write_covering_bbox=True
+                )
+                logger.info("💾 Saved: %s", file_path)
                 
             elif output_format == "geojson":
                 file_path = output_path / f"{output_name}.geojson"
-                gdf.to_file(file_path, driver="GeoJSON")
-                logger.info(f"💾 Saved: {file_path}")
+                if len(gdf) > GEOJSON_WARN_FEATURES:
+                    logger.warning(
+                        "⚠️ Writing %d features as GeoJSON; parquet output is "
+                        "typically ~5x smaller and much faster to write and read",
+                        len(gdf)
+                    )
+                gdf.to_file(file_path, driver="GeoJSON", engine=IO_ENGINE, **IO_WRITE_KWARGS)
+                logger.info("💾 Saved: %s", file_path)
                 
             elif output_format == "gpkg":
                 file_path = output_path / f"{output_name}.gpkg"
-                gdf.to_file(file_path, driver="GPKG")
-                logger.info(f"💾 Saved: {file_path}")
+                gdf.to_file(file_path, driver="GPKG", engine=IO_ENGINE, **IO_WRITE_KWARGS)
+                logger.info("💾 Saved: %s", file_path)
                 
             else:
-                logger.warning(f"⚠️ Unsupported format: {output_format}")
+                logger.warning("⚠️ Unsupported format: %s", output_format)
                 
         except Exception as e:
-            logger.error(f"❌ Failed to save {output_name}: {e}")
+            logger.error("❌ Failed to save %s: %s", output_name, e)
     
     def load_data(
         self,
         file_path: Union[str, Path],
-        file_type: Optional[str] = None
+        file_type: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None
     ) -> Optional[Union[gpd.GeoDataFrame, pd.DataFrame]]:
         """
         Load data from various file formats.
         
         Args:
             file_path: Path to the data file
-            file_type: File type ('auto', 'parquet', 'geojson', 'gpkg', 'csv')
+            file_type: File type ('auto', 'parquet', 'geojson', 'gpkg', 'fgb', 'csv').
+                'auto' detects the format from the file header, then the extension.
+            columns: Attribute columns to read from parquet files (geometry is
+                always kept). If None, all columns are read.
+            bbox: Optional (min_lon, min_lat, max_lon, max_lat) filter for
+                GeoParquet files; pushed down to the read when the file has a
+                bbox covering column
             
         Returns:
             Loaded data as GeoDataFrame or DataFrame
@@ -288,12 +801,14 @@ class DataLoader:
         file_path = Path(file_path)
         
         if not file_path.exists():
-            logger.error(f"❌ File not found: {file_path}")
+            logger.error("❌ File not found: %s", file_path)
             return None
         
         try:
-            # Auto-detect file type if not specified
+            # Auto-detect file type if not specified: content first, extension as fallback
             if file_type is None or file_type == "auto":
+                file_type = self._sniff_file_type(file_path)
+            if file_type is None:
                 if file_path.suffix.lower() in [".geojson", ".json"]:
                     file_type = "geojson"
                 elif file_path.suffix.lower() == ".parquet":
@@ -305,28 +820,269 @@ class DataLoader:
                 else:
                     file_type = "auto"
             
-            logger.info(f"📂 Loading data from: {file_path}")
+            logger.info("📂 Loading data from: %s", file_path)
             
             if file_type == "parquet":
-                df = pd.read_parquet(file_path)
-                # Check if it has geometry column
-                if "geometry" in df.columns:
-                    return gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:4326")
-                return df
-                
-            elif file_type in ["geojson", "gpkg"]:
-                return gpd.read_file(file_path)
+                return self._load_parquet_with_geometry(file_path, columns=columns, bbox=bbox)
                 
             elif file_type == "csv":
-                return pd.read_csv(file_path)
+                return _pd().read_csv(file_path)
                 
             else:
-                # Try to auto-detect
-                return gpd.read_file(file_path)
+                # GeoJSON / GPKG / FlatGeobuf, or let OGR auto-detect the format
+                return self._read_vector_file_cached(file_path)
                 
         except Exception as e:
-            logger.error(f"❌ Failed to load data from {file_path}: {e}")
+            logger.error("❌ Failed to load data from %s: %s", file_path, e)
+            return None
+    
+    @staticmethod
+    def _sniff_file_type(file_path: Path) -> Optional[str]:
+        """
+        Detect the file format from its leading magic bytes.
+        
+        Args:
+            file_path: Path to the data file
+            
+        Returns:
+            'parquet', 'fgb', 'gpkg' or 'geojson', or None if unrecognised
+        """
+        try:
+            with open(file_path, "rb") as f:
+                head = f.read(16)
+        except OSError:
             return None
+        
+        if head.startswith(b"PAR1"):
+            return "parquet"
+        if head.startswith(b"fgb\x03"):
+            return "fgb"
+        if head.startswith(b"SQLite format 3"):
+            return "gpkg"
+        if head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"{"):
+            return "geojson"
+        return None
+    
+    def load_all_layers(
+        self,
+        layer_paths: Optional[Dict[str, Union[str, Path]]] = None,
+        parallel: bool = True,
+        max_workers: Optional[int] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None
+    ) -> Dict[str, Union[gpd.GeoDataFrame, pd.DataFrame]]:
+        """
+        Load several data layers, concurrently by default.
+        
+        Layer reads are I/O and GDAL/Arrow decode bound and release the GIL,
+        so a thread pool brings total load time close to the slowest layer.
+        
+        Args:
+            layer_paths: Mapping of layer name to file path. If None, every
+                ``*.parquet`` file one level below output_dir is loaded,
+                keyed by file name up to the first dot (so keyed extraction
+                outputs like ``city_roads.<key>.parquet`` map to ``city_roads``).
+            parallel: Load layers in a thread pool (disable for debugging)
+            max_workers: Thread pool size (defaults to min(8, number of layers))
+            bbox: Optional area of interest passed on to load_data
+            
+        Returns:
+            Dictionary mapping layer names to loaded data, in input order.
+            Layers that fail to load are left out.
+        """
+        if layer_paths is None:
+            # Keyed outputs sort after a leftover unkeyed <name>.parquet of the
+            # same layer, so the keyed file wins
+            found = sorted(
+                (path for path in self.output_dir.glob("*/*.parquet") if path.parent != self.cache_dir),
+                key=lambda path: (path.parent, path.name.split(".")[0], path.name.count(".") > 1)
+            )
+            layer_paths = {path.name.split(".")[0]: path for path in found}
+        
+        if not layer_paths:
+            logger.warning("⚠️ No layers found to load in %s", self.output_dir)
+            return {}
+        
+        names = list(layer_paths)
+        load = partial(self.load_data, bbox=bbox)
+        if parallel and len(names) > 1:
+            workers = max_workers or min(8, len(names))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                loaded = list(executor.map(load, (layer_paths[name] for name in names)))
+        else:
+            loaded = [load(layer_paths[name]) for name in names]
+        
+        results = {}
+        for name, data in zip(names, loaded):
+            if data is not None:
+                results[name] = data
+            else:
+                logger.warning("⚠️ %s: failed to load", name)
+        
+        logger.info("✅ Loaded %s/%s layers", len(results), len(names))
+        return results
+    
+    def _read_vector_file_cached(self, file_path: Path) -> gpd.GeoDataFrame:
+        """
+        Read an OGR vector file through the on-disk GeoParquet cache.
+        
+        The cache key covers the resolved path and modification time, so an
+        edited source is re-read and its older cached copies are removed.
+        Cached copies are GeoArrow-encoded (WKB for mixed geometry types),
+        zstd compressed and carry a bbox covering column for row-group skipping.
+        
+        Args:
+            file_path: Path to the vector file
+            
+        Returns:
+            GeoDataFrame with the file contents
+        """
+        if not self.use_cache:
+            return self._read_vector_file(file_path)
+        
+        stat = file_path.stat()
+        resolved = file_path.resolve()
+        # Path part first, so older versions of the same source share a prefix
+        path_key = hashlib.blake2b(str(resolved).encode()).hexdigest()[:8]
+        version_key = hashlib.blake2b(
+            f"{resolved}:{stat.st_mtime_ns}".encode()
+        ).hexdigest()[:8]
+        cache_path = self.cache_dir / f"{file_path.stem}_{path_key}{version_key}.parquet"
+        
+        if cache_path.exists():
+            logger.info("📦 Using cached copy: %s", cache_path)
+            return _gpd().read_parquet(cache_path)
+        
+        gdf = self._read_vector_file(file_path)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                gdf.to_parquet(
+                    cache_path,
+                    geometry_encoding="geoarrow",
+                    compression="zstd",
+                    write_covering_bbox=True
+                )
+            except ValueError:
+                # GeoArrow cannot encode mixed geometry types or collections
+                gdf.to_parquet(
+                    cache_path,
+                    geometry_encoding="WKB",
+                    compression="zstd",
+                    write_covering_bbox=True
+                )
+            # Cached copies of earlier versions of this source are never read again
+            for stale in self.cache_dir.glob(f"{file_path.stem}_{path_key}*.parquet"):
+                if stale != cache_path:
+                    stale.unlink(missing_ok=True)
+        except Exception as e:
+            # Caching is best effort; the data itself loaded fine
+            logger.warning("⚠️ Could not cache %s: %s", file_path, e)
+        return gdf
+    
+    def _read_vector_file(self, file_path: Path) -> gpd.GeoDataFrame:
+        """
+        Read an OGR vector file (GeoJSON, GeoPackage, Shapefile, ...).
+        
+        Uses pyogrio with Arrow record batches when available, which avoids
+        fiona's feature-by-feature Python loop; otherwise falls back to fiona.
+        
+        Args:
+            file_path: Path to the vector file
+            
+        Returns:
+            GeoDataFrame with the file contents
+        """
+        if PYOGRIO_AVAILABLE:
+            try:
+                gdf = _gpd().read_file(file_path, engine="pyogrio", use_arrow=True)
+                logger.debug("Read %s with pyogrio (arrow)", file_path)
+                return gdf
+            except ImportError:
+                # use_arrow needs pyarrow; fall through to fiona
+                pass
+        
+        gdf = _gpd().read_file(file_path, engine="fiona")
+        logger.debug("Read %s with fiona", file_path)
+        return gdf
+    
+    def _load_parquet_with_geometry(
+        self,
+        file_path: Path,
+        columns: Optional[List[str]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None
+    ) -> Union[gpd.GeoDataFrame, pd.DataFrame]:
+        """
+        Load a parquet file, decoding its WKB geometry column if present.
+        
+        GeoParquet files (with "geo" schema metadata) are read natively by
+        geopandas; plain parquet with a WKB "geometry" column is decoded here.
+        Writers should prefer ``to_parquet(geometry_encoding="geoarrow")``.
+        
+        Args:
+            file_path: Path to the parquet file
+            columns: Attribute columns to read; the geometry column is added
+                automatically. If None, all columns are read.
+            bbox: Optional (min_lon, min_lat, max_lon, max_lat) filter. Only
+                applied to GeoParquet, where row groups whose bbox covering
+                statistics miss it are skipped without decoding; files
+                without a covering are filtered after reading.
+            
+        Returns:
+            GeoDataFrame if the file has a geometry column, otherwise DataFrame
+        """
+        is_geoparquet = False
+        has_covering = False
+        if PYARROW_AVAILABLE:
+            schema = _pq().read_schema(file_path)
+            metadata = schema.metadata or {}
+            is_geoparquet = b"geo" in metadata
+            geom_col = "geometry"
+            if is_geoparquet:
+                geo = json.loads(metadata[b"geo"])
+                geom_col = geo.get("primary_column", geom_col)
+                has_covering = "covering" in geo.get("columns", {}).get(geom_col, {})
+            if columns is not None:
+                if geom_col in schema.names and geom_col not in columns:
+                    columns = list(columns) + [geom_col]
+                # Plain parquet keeps its CRS in a per-row column (dropped below)
+                if not is_geoparquet and "crs" in schema.names and "crs" not in columns:
+                    columns = list(columns) + ["crs"]
+                if len(columns) * 2 < len(schema.names):
+                    logger.info("📉 Reading %s/%s columns from %s", len(columns), len(schema.names), file_path.name)
+        
+        if is_geoparquet:
+            if bbox is None or has_covering:
+                return _gpd().read_parquet(file_path, columns=columns, bbox=bbox)
+            # Files without a bbox covering column (older outputs, QuackOSM
+            # extractions) cannot be filtered on read; filter after decoding
+            gdf = _gpd().read_parquet(file_path, columns=columns)
+            return gdf.cx[bbox[0]:bbox[2], bbox[1]:bbox[3]]
+        
+        if PYARROW_AVAILABLE:
+            # Keep attribute columns Arrow-backed instead of copying them into
+            # numpy; self_destruct releases Arrow buffers as pandas takes them over
+            table = _pq().read_table(file_path, columns=columns)
+            df = table.to_pandas(types_mapper=_pd().ArrowDtype, self_destruct=True)
+            del table
+        else:
+            df = _pd().read_parquet(file_path, columns=columns)
+        if "geometry" not in df.columns:
+            return df
+        
+        # Plain parquet exports may carry the CRS as a per-row column
+        crs = "EPSG:4326"
+        if "crs" in df.columns:
+            if len(df) and _pd().notna(df["crs"].iloc[0]):
+                crs = df["crs"].iloc[0]
+            df = df.drop(columns="crs")
+        
+        # Decode all WKB blobs in one vectorized GEOS call, attaching the CRS up
+        # front so the frame is never re-tagged afterwards. Arrow-backed columns
+        # hold nulls as pd.NA, which from_wkb rejects, so map them to None
+        # (decoded as missing geometries)
+        wkb = df["geometry"].to_numpy(dtype=object, na_value=None)
+        df["geometry"] = _gpd().GeoSeries.from_wkb(wkb, index=df.index, crs=crs)
+        return _gpd().GeoDataFrame(df, geometry="geometry")
     
     def get_data_summary(self, gdf: gpd.GeoDataFrame) -> Dict:
         """
@@ -341,12 +1097,17 @@ class DataLoader:
         if gdf is None or gdf.empty:
             return {"error": "No data to summarize"}
         
+        # One vectorized type lookup over all geometries, not just the first row
+        geometry_types = gdf.geometry.geom_type.value_counts().to_dict()
+        
         summary = {
             "total_features": len(gdf),
             "columns": list(gdf.columns),
-            "geometry_type": str(gdf.geometry.geom_type.iloc[0]) if not gdf.empty else None,
+            "geometry_type": next(iter(geometry_types)) if len(geometry_types) == 1 else "Mixed",
+            "geometry_types": geometry_types,
             "crs": str(gdf.crs) if hasattr(gdf, 'crs') else None,
-            "memory_usage": f"{gdf.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB"
+            # Shallow count: deep=True walks every Python string cell
+            "memory_usage": f"{gdf.memory_usage(deep=False).sum() / 1024 / 1024:.2f} MB (shallow)"
         }
         
         # Add column statistics for non-geometry columns
@@ -383,8 +1144,8 @@ def extract_city_osm_data(
     
     loader = DataLoader(output_dir)
     
-    logger.info(f"🏙️ Extracting OSM data for {city_name}")
-    logger.info(f"📁 Output directory: {output_dir}")
+    logger.info("🏙️ Extracting OSM data for %s", city_name)
+    logger.info("📁 Output directory: %s", output_dir)
     
     results = loader.extract_osm_layers(
         pbf_file=pbf_file,
@@ -394,8 +1155,8 @@ def extract_city_osm_data(
         output_format=output_format
     )
     
-    logger.info(f"🎉 Extraction complete for {city_name}")
-    logger.info(f"📊 Extracted layers: {list(results.keys())}")
+    logger.info("🎉 Extraction complete for %s", city_name)
+    logger.info("📊 Extracted layers: %s", list(results.keys()))
     
     return results
 
@@ -3,9 +3,28 @@ Database Management Module
 
 This module provides database setup, PostGIS management, and connection utilities
 for the ETL Geodata Pipeline system.
+
+The classes are imported on first access (PEP 562), so importing the package
+does not pull in psycopg2 for workflows that never touch the database.
 """
 
-from .database_manager import DatabaseManager
-from .postgis_manager import PostGISManager
+import importlib
+
+_LAZY = {
+    'DatabaseManager': '.database_manager',
+    'PostGISManager': '.postgis_manager',
+}
 
 __all__ = ['DatabaseManager', 'PostGISManager']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        obj = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = obj
+        return obj
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,88 @@
+"""Tests for the Stuttgart BaseCityAnalysis result writers."""
+
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+gpd = pytest.importorskip("geopandas")
+shapely = pytest.importorskip("shapely")
+pytest.importorskip("pyarrow")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "cities" / "stuttgart" / "spatial_analysis"))
+
+from core.base_analysis import BaseCityAnalysis  # noqa: E402
+
+
+class _Analysis(BaseCityAnalysis):
+    def run_city_analysis(self):
+        return {}
+
+
+@pytest.fixture
+def analysis():
+    """An analysis instance without the city loaders, for exercising the writers"""
+    obj = _Analysis.__new__(_Analysis)
+    obj.city_name = "test"
+    obj.save_legacy_geojson = False
+    obj.logger = logging.getLogger(__name__)
+    return obj
+
+
+def test_save_mixed_geometry_result(analysis, tmp_path):
+    """Mixed geometry types cannot be GeoArrow-encoded and are saved as WKB"""
+    gdf = gpd.GeoDataFrame(
+        {"id": [1, 2, 3]},
+        geometry=[
+            shapely.Point(9.18, 48.78),
+            shapely.box(9.1, 48.7, 9.2, 48.8),
+            shapely.GeometryCollection([shapely.Point(9.2, 48.8)]),
+        ],
+        crs="EPSG:4326",
+    )
+
+    analysis.save_results({"mixed": gdf}, output_dir=str(tmp_path))
+
+    saved = gpd.read_parquet(tmp_path / "mixed.parquet")
+    assert saved["id"].tolist() == [1, 2, 3]
+    assert saved.geometry.geom_equals(gdf.geometry).all()
+
+
+def test_scalars_batched_apart_from_results(analysis, tmp_path):
+    """Batched scalars, numpy ones included, do not overwrite a result named scalars"""
+    import json
+
+    import numpy as np
+
+    analysis.save_results(
+        {"scalars": {"a": 1}, "count": np.int64(3), "ratio": np.float32(0.5), "label": "x"},
+        output_dir=str(tmp_path),
+    )
+
+    assert json.loads((tmp_path / "scalars.json").read_text()) == {"a": 1}
+    assert json.loads((tmp_path / "_scalars.json").read_text()) == {"count": 3, "ratio": 0.5, "label": "x"}
+
+
+def test_save_results_after_output_dir_removed(analysis, tmp_path):
+    """A memoized output directory that was deleted is created again"""
+    import shutil
+
+    import pandas as pd
+
+    out = tmp_path / "outputs"
+    analysis.save_results({"table": pd.DataFrame({"a": [1]})}, output_dir=str(out))
+    shutil.rmtree(out)
+
+    analysis.save_results({"table": pd.DataFrame({"a": [2]})}, output_dir=str(out))
+
+    assert pd.read_parquet(out / "table.parquet")["a"].tolist() == [2]
+
+
+def test_ensure_dir_memo_follows_working_directory(tmp_path, monkeypatch):
+    """The same relative path is created again under a new working directory"""
+    for cwd in ("first", "second"):
+        (tmp_path / cwd).mkdir()
+        monkeypatch.chdir(tmp_path / cwd)
+        BaseCityAnalysis._ensure_dir(Path("outputs"))
+        assert (tmp_path / cwd / "outputs").is_dir()
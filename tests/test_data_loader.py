@@ -0,0 +1,138 @@
+"""Tests for spatial_analysis_core.data_loader."""
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+shapely = pytest.importorskip("shapely")
+pytest.importorskip("geopandas")
+
+from spatial_analysis_core.data_loader import DataLoader
+
+
+def test_plain_parquet_with_null_geometry(tmp_path):
+    """A null WKB cell in a plain (non-GeoParquet) file loads as a missing geometry"""
+    path = tmp_path / "points.parquet"
+    table = pa.table({
+        "id": [1, 2],
+        "geometry": pa.array([shapely.to_wkb(shapely.Point(9.18, 48.78)), None], type=pa.binary()),
+    })
+    pq.write_table(table, path)
+
+    gdf = DataLoader(tmp_path).load_data(path)
+
+    assert gdf is not None
+    assert len(gdf) == 2
+    assert gdf.crs == "EPSG:4326"
+    assert gdf.geometry.iloc[0].equals(shapely.Point(9.18, 48.78))
+    assert gdf.geometry.isna().tolist() == [False, True]
+
+
+def test_save_parquet_with_empty_geometry(tmp_path):
+    """Empty geometries skip the Hilbert sort instead of aborting the save"""
+    import geopandas as gpd
+
+    gdf = gpd.GeoDataFrame(
+        {"id": [1, 2, 3]},
+        geometry=[shapely.Point(9.18, 48.78), shapely.Point(), shapely.Point(9.2, 48.8)],
+        crs="EPSG:4326",
+    )
+
+    DataLoader(tmp_path)._save_data(gdf, tmp_path, "points", "parquet")
+
+    saved = gpd.read_parquet(tmp_path / "points.parquet")
+    assert saved["id"].tolist() == [1, 2, 3]
+
+
+def test_load_all_layers_prefers_keyed_output(tmp_path):
+    """A leftover unkeyed <name>.parquet does not shadow the keyed extraction"""
+    import geopandas as gpd
+
+    layer_dir = tmp_path / "osm"
+    layer_dir.mkdir()
+    for name, ids in (("roads.parquet", [1]), ("roads.0a1b2c.parquet", [1, 2])):
+        gpd.GeoDataFrame(
+            {"id": ids}, geometry=[shapely.Point(9.18, 48.78)] * len(ids), crs="EPSG:4326"
+        ).to_parquet(layer_dir / name)
+
+    layers = DataLoader(tmp_path).load_all_layers(parallel=False)
+
+    assert list(layers) == ["roads"]
+    assert len(layers["roads"]) == 2
+
+
+def test_bbox_filter_on_geoparquet_without_covering(tmp_path):
+    """GeoParquet without a bbox covering column is filtered after reading"""
+    import geopandas as gpd
+
+    path = tmp_path / "points.parquet"
+    gpd.GeoDataFrame(
+        {"id": [1, 2]},
+        geometry=[shapely.Point(9.18, 48.78), shapely.Point(13.4, 52.5)],
+        crs="EPSG:4326",
+    ).to_parquet(path)
+
+    gdf = DataLoader(tmp_path).load_data(path, bbox=(9.0, 48.6, 9.4, 48.9))
+
+    assert gdf is not None
+    assert gdf["id"].tolist() == [1]
+
+
+def test_plain_parquet_crs_column_with_projection(tmp_path):
+    """The per-row crs column is honoured even when only some columns are read"""
+    path = tmp_path / "points.parquet"
+    table = pa.table({
+        "name": ["a"],
+        "crs": ["EPSG:25832"],
+        "geometry": pa.array([shapely.to_wkb(shapely.Point(513000, 5402000))], type=pa.binary()),
+    })
+    pq.write_table(table, path)
+
+    gdf = DataLoader(tmp_path).load_data(path, columns=["name"])
+
+    assert gdf.crs == "EPSG:25832"
+    assert list(gdf.columns) == ["name", "geometry"]
+
+
+def test_prune_columns_stores_tags_as_categoricals(tmp_path):
+    """Text tag columns become categoricals whatever the pandas string dtype"""
+    import geopandas as gpd
+    import pandas as pd
+
+    gdf = gpd.GeoDataFrame(
+        {"shop": ["bakery", "bakery", "kiosk"], "level": [0, 1, 0], "dropped": ["x", "y", "z"]},
+        geometry=[shapely.Point(9.18, 48.78)] * 3,
+        crs="EPSG:4326",
+    )
+
+    pruned = DataLoader._prune_columns(gdf, ["shop", "level"])
+
+    assert list(pruned.columns) == ["shop", "level", "geometry"]
+    assert isinstance(pruned["shop"].dtype, pd.CategoricalDtype)
+    assert not isinstance(pruned["level"].dtype, pd.CategoricalDtype)
+
+
+def test_vector_cache_mixed_geometries_and_stale_copies(tmp_path):
+    """Mixed-geometry sources are cached (as WKB) and edits replace the old copy"""
+    import os
+
+    import geopandas as gpd
+
+    source = tmp_path / "features.geojson"
+    gpd.GeoDataFrame(
+        {"id": [1, 2]},
+        geometry=[shapely.Point(9.18, 48.78), shapely.box(9.1, 48.7, 9.2, 48.8)],
+        crs="EPSG:4326",
+    ).to_file(source, driver="GeoJSON")
+    loader = DataLoader(tmp_path)
+
+    assert len(loader.load_data(source)) == 2
+    first = list(loader.cache_dir.glob("features_*.parquet"))
+    assert len(first) == 1
+
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert len(loader.load_data(source)) == 2
+    second = list(loader.cache_dir.glob("features_*.parquet"))
+    assert len(second) == 1
+    assert second != first
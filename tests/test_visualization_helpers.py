@@ -0,0 +1,61 @@
+"""Tests for the Stuttgart visualization helpers."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+gpd = pytest.importorskip("geopandas")
+pd = pytest.importorskip("pandas")
+shapely = pytest.importorskip("shapely")
+pytest.importorskip("pyarrow")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "cities" / "stuttgart" / "spatial_analysis"))
+
+from utils import visualization_helpers as vh  # noqa: E402
+
+
+@pytest.fixture
+def city_data(tmp_path, monkeypatch):
+    """District boundaries and a transport KPI table in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data/processed").mkdir(parents=True)
+    (tmp_path / "data/results").mkdir(parents=True)
+    gpd.GeoDataFrame(
+        {"district_id": ["a", "b"]},
+        geometry=[shapely.box(0, 0, 1, 1), shapely.box(1, 0, 2, 1)],
+        crs="EPSG:4326",
+    ).to_file(tmp_path / "data/processed/stuttgart_districts.geojson", driver="GeoJSON")
+    pd.DataFrame({
+        "district_id": ["a", "b"], "population_300m_pt": [0.5, 0.8], "pt_stops_count": [3, 4],
+    }).to_parquet(tmp_path / "data/results/transport_kpis.parquet")
+    vh._read_district_boundaries.cache_clear()
+    vh._read_kpi_table.cache_clear()
+    vh._MERGE_CACHE.clear()
+    yield
+    vh._read_district_boundaries.cache_clear()
+    vh._read_kpi_table.cache_clear()
+    vh._MERGE_CACHE.clear()
+
+
+def test_merge_reuses_join_of_loader_outputs(city_data, monkeypatch):
+    """Merging fresh loader copies of the same files joins only once"""
+    first = vh.merge_district_kpis(vh.load_district_boundaries({}), vh.load_kpi_results("transport_kpis"))
+
+    merges = []
+    original = gpd.GeoDataFrame.merge
+    monkeypatch.setattr(gpd.GeoDataFrame, "merge", lambda self, *a, **kw: merges.append(1) or original(self, *a, **kw))
+    second = vh.merge_district_kpis(vh.load_district_boundaries({}), vh.load_kpi_results("transport_kpis"))
+
+    assert merges == []
+    assert len(vh._MERGE_CACHE) == 1
+    assert second["pt_stops_count"].tolist() == first["pt_stops_count"].tolist() == [3, 4]
+
+
+def test_merge_of_derived_frame_is_not_cached(city_data):
+    """Frames that did not come straight from the loaders are always merged afresh"""
+    kpis = vh.load_kpi_results("transport_kpis")
+    merged = vh.merge_district_kpis(vh.load_district_boundaries({}), kpis[kpis["pt_stops_count"] > 3])
+
+    assert merged["pt_stops_count"].isna().tolist() == [True, False]
+    assert len(vh._MERGE_CACHE) == 0